@@ -0,0 +1,65 @@
+"""Plain-dict serializers with sparse fieldsets.
+
+Each resource maps its public field names to getters; ``?fields=a,b``
+picks a subset of them, in that order.
+"""
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+Getters = Dict[str, Callable[[Any], Any]]
+
+POST_FIELDS: Getters = {
+    'id': lambda post: post.pk,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'comments_count': lambda post: post.comments_count,
+    'image': lambda post: post.image.url if post.image else None,
+}
+
+COMMENT_FIELDS: Getters = {
+    'id': lambda comment: comment.pk,
+    'post': lambda comment: comment.post_id,
+    'author': lambda comment: comment.author.username,
+    'text': lambda comment: comment.text,
+    'created': lambda comment: comment.created.isoformat(),
+}
+
+
+class InvalidFields(ValueError):
+    """``?fields=`` names a field the resource doesn't have."""
+
+
+def parse_fields(request, getters: Getters) -> Tuple[str, ...]:
+    """Fields requested with ``?fields=``, or all of them."""
+    requested = request.GET.get('fields', '')
+    fields = tuple(dict.fromkeys(
+        name.strip() for name in requested.split(',') if name.strip()
+    ))
+    if not fields:
+        return tuple(getters)
+    unknown = [name for name in fields if name not in getters]
+    if unknown:
+        raise InvalidFields(
+            'Unknown fields: {}. Available: {}.'.format(
+                ', '.join(unknown), ', '.join(getters)
+            )
+        )
+    return fields
+
+
+def serialize(obj, fields: Iterable[str], getters: Getters) -> Dict:
+    return {name: getters[name](obj) for name in fields}
+
+
+def trim_posts(queryset, fields: Iterable[str]):
+    """Adapt a feed queryset to the requested fields.
+
+    Feed querysets defer the full text and prefetch image variants for
+    the HTML cards; the API loads the text only when it is asked for and
+    never needs the variants.
+    """
+    queryset = queryset.prefetch_related(None)
+    if 'text' in fields:
+        queryset = queryset.defer(None)
+    return queryset
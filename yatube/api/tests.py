@@ -0,0 +1,142 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.testing import QueryBudgetMixin
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Follow.objects.create(author=cls.author, user=cls.reader)
+        for i in range(15):
+            cls.post = Post.objects.create(
+                author=cls.author,
+                group=cls.group if i % 2 else None,
+                text=f'Текст {i}',
+            )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Comment {i}'
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds_match_html_feeds(self) -> None:
+        feeds = {
+            reverse('api:posts'): Post.objects.all(),
+            reverse('api:group_posts', kwargs={'slug': self.group.slug}):
+                self.group.posts.all(),
+            reverse('api:profile_posts', kwargs={'username': 'author'}):
+                self.author.posts.all(),
+            reverse('api:follow'): Post.objects.filter(author=self.author),
+        }
+        for url, expected in feeds.items():
+            with self.subTest(url=url):
+                response = self.reader_client.get(url, {'limit': 5})
+                data = response.json()
+
+                self.assertWithinQueryBudget(response)
+                self.assertEqual(
+                    [post['id'] for post in data['results']],
+                    [post.pk for post in expected[:5]],
+                )
+                self.assertIsNone(data['previous'])
+                self.assertIn('cursor=', data['next'])
+
+    def test_cursor_links_walk_the_feed(self) -> None:
+        url = reverse('api:posts') + '?limit=4&fields=id'
+        seen = []
+        while url:
+            data = self.client.get(url).json()
+            seen += [post['id'] for post in data['results']]
+            url = data['next']
+
+        self.assertEqual(seen, list(Post.objects.values_list('pk', flat=True)))
+
+    def test_sparse_fieldsets(self) -> None:
+        response = self.client.get(
+            reverse('api:post', kwargs={'post_id': self.post.pk}),
+            {'fields': 'text,author'},
+        )
+
+        self.assertEqual(
+            response.json(), {'text': self.post.text, 'author': 'author'}
+        )
+        response = self.client.get(reverse('api:posts'), {'fields': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('nope', response.json()['detail'])
+
+    def test_post_and_comments(self) -> None:
+        post = self.client.get(
+            reverse('api:post', kwargs={'post_id': self.post.pk})
+        ).json()
+        comments = self.client.get(
+            reverse('api:comments', kwargs={'post_id': self.post.pk})
+        ).json()
+
+        self.assertEqual(set(post), {
+            'id', 'text', 'pub_date', 'author', 'group', 'comments_count',
+            'image',
+        })
+        self.assertEqual(post['comments_count'], 3)
+        self.assertEqual(
+            [comment['text'] for comment in comments['results']],
+            ['Comment 2', 'Comment 1', 'Comment 0'],
+        )
+
+    def test_errors_are_json(self) -> None:
+        missing = self.client.get(
+            reverse('api:post', kwargs={'post_id': 0})
+        )
+        anonymous = self.client.get(reverse('api:follow'))
+
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.json(), {'detail': 'Not found.'})
+        self.assertEqual(anonymous.status_code, 401)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_etag_revalidation(self) -> None:
+        url = reverse('api:posts')
+        etag = self.client.get(url)['ETag']
+
+        not_modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        Post.objects.create(author=self.author, text='New post')
+        modified = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified['ETag'], etag)
+
+    def test_export_is_streamed(self) -> None:
+        response = self.client.get(
+            reverse('api:export_posts'), {'fields': 'id,text'}
+        )
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        data = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(
+            data,
+            [
+                {'id': post.pk, 'text': post.text}
+                for post in Post.objects.order_by('-pub_date', '-pk')
+            ],
+        )
@@ -0,0 +1,188 @@
+import json
+from functools import wraps
+from itertools import islice
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import (
+    Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse,
+)
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import condition, require_GET
+
+from core.paginator import CursorPaginator
+from posts import fragments
+from posts.models import Comment, Group, Post, User
+from posts.timeline import TimelinePaginator
+
+from .serializers import (
+    COMMENT_FIELDS, POST_FIELDS, InvalidFields, parse_fields, serialize,
+    trim_posts,
+)
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 100
+EXPORT_BATCH = 500
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+def error(status: int, detail: str) -> JsonResponse:
+    return JsonResponse(
+        {'detail': detail}, status=status, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view):
+    """Read-only JSON endpoint reporting errors as JSON."""
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return error(404, 'Not found.')
+        except InvalidFields as exc:
+            return error(400, str(exc))
+
+    return require_GET(wrapper)
+
+
+def limit(request: HttpRequest) -> int:
+    """Page size from ``?limit=``, between 1 and ``MAX_LIMIT``."""
+    try:
+        return min(max(int(request.GET['limit']), 1), MAX_LIMIT)
+    except (KeyError, ValueError):
+        return DEFAULT_LIMIT
+
+
+def page_link(request: HttpRequest, cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'?{params.urlencode()}')
+
+
+def page_response(request: HttpRequest, paginator, getters) -> JsonResponse:
+    """One cursor page of ``paginator`` serialized with ``getters``."""
+    fields = parse_fields(request, getters)
+    page = paginator.get_page(request.GET.get('cursor'))
+    return JsonResponse({
+        'results': [serialize(obj, fields, getters) for obj in page],
+        'next': page_link(request, page.next_cursor),
+        'previous': page_link(request, page.previous_cursor),
+    }, json_dumps_params=JSON_PARAMS)
+
+
+def post_page(request: HttpRequest, queryset, paginator_class=None,
+              **kwargs) -> JsonResponse:
+    queryset = trim_posts(queryset, parse_fields(request, POST_FIELDS))
+    paginator_class = paginator_class or CursorPaginator
+    return page_response(
+        request,
+        paginator_class(queryset, limit(request), **kwargs),
+        POST_FIELDS,
+    )
+
+
+@api_view
+@condition(etag_func=fragments.index_etag)
+def posts(request: HttpRequest) -> HttpResponse:
+    """Index feed."""
+    return post_page(request, Post.objects.for_feed())
+
+
+@api_view
+@condition(etag_func=fragments.group_etag)
+def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
+    """Group feed."""
+    group = get_object_or_404(Group, slug=slug)
+    return post_page(request, group.posts.for_feed())
+
+
+@api_view
+@condition(etag_func=fragments.profile_etag)
+def profile_posts(request: HttpRequest, username: str) -> HttpResponse:
+    """Posts of a user."""
+    author = get_object_or_404(User, username=username)
+    return post_page(request, author.posts.for_feed())
+
+
+@api_view
+@condition(etag_func=fragments.follow_etag)
+def follow(request: HttpRequest) -> HttpResponse:
+    """Posts of the authors the user follows."""
+    if not request.user.is_authenticated:
+        return error(401, 'Authentication required.')
+    return post_page(
+        request,
+        Post.objects.for_feed(),
+        TimelinePaginator,
+        user=request.user,
+    )
+
+
+@api_view
+@condition(etag_func=fragments.post_etag)
+def post(request: HttpRequest, post_id: int) -> HttpResponse:
+    """A single post."""
+    fields = parse_fields(request, POST_FIELDS)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    return JsonResponse(
+        serialize(post, fields, POST_FIELDS), json_dumps_params=JSON_PARAMS
+    )
+
+
+@api_view
+@condition(etag_func=fragments.post_etag)
+def comments(request: HttpRequest, post_id: int) -> HttpResponse:
+    """Comments of a post, newest first."""
+    if not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    return page_response(
+        request,
+        CursorPaginator(
+            Comment.objects.filter(post_id=post_id).select_related('author'),
+            limit(request),
+            key='created',
+        ),
+        COMMENT_FIELDS,
+    )
+
+
+def stream_array(objects, fields, getters):
+    """Serialize ``objects`` as a JSON array, ``EXPORT_BATCH`` at a time."""
+    objects = iter(objects)
+    yield '['
+    separator = ''
+    while True:
+        batch = list(islice(objects, EXPORT_BATCH))
+        if not batch:
+            break
+        yield separator + ','.join(
+            json.dumps(
+                serialize(obj, fields, getters),
+                cls=DjangoJSONEncoder,
+                **JSON_PARAMS,
+            )
+            for obj in batch
+        )
+        separator = ','
+    yield ']'
+
+
+@api_view
+@condition(etag_func=fragments.index_etag)
+def export_posts(request: HttpRequest) -> HttpResponse:
+    """Every post, newest first, streamed as one JSON array."""
+    fields = parse_fields(request, POST_FIELDS)
+    queryset = trim_posts(Post.objects.for_feed(), fields).order_by(
+        '-pub_date', '-pk'
+    )
+    return StreamingHttpResponse(
+        stream_array(
+            queryset.iterator(chunk_size=EXPORT_BATCH), fields, POST_FIELDS
+        ),
+        content_type='application/json',
+    )
@@ -1,5 +1,14 @@
 from django.apps import AppConfig
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self) -> None:
+        from .auth_backends import invalidate
+
+        user_model = get_user_model()
+        post_save.connect(invalidate, sender=user_model)
+        post_delete.connect(invalidate, sender=user_model)
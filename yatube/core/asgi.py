@@ -0,0 +1,136 @@
+"""ASGI adapter for the WSGI application.
+
+Django 2.2 has no ASGI handler, so ASGI servers (uvicorn, daphne) run the
+WSGI application through ``WsgiToAsgi``: the event loop reads request
+bodies and writes responses, while each request runs in one of a pool of
+worker threads. The application is called, iterated and closed on that
+one thread, so the thread-local database connection it used is closed
+or kept according to ``CONN_MAX_AGE`` when the response finishes. A
+streaming response holds its thread until the last chunk is sent.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+Scope = Dict[str, Any]
+Headers = List[Tuple[bytes, bytes]]
+
+
+def wsgi_environ(scope: Scope, body: BytesIO) -> Dict[str, Any]:
+    """WSGI environ of the HTTP request described by ``scope``."""
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path):]
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode().decode('latin-1'),
+        'PATH_INFO': path.encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': str(client[0]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+class WsgiToAsgi:
+    """ASGI application running ``wsgi_application`` on ``threads``."""
+
+    def __init__(self, wsgi_application: Callable, threads: int) -> None:
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope: Scope, receive: Callable,
+                       send: Callable) -> None:
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] != 'http':
+            raise ValueError(f"Unsupported ASGI scope {scope['type']!r}")
+
+        body = BytesIO()
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.write(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        body.seek(0)
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor, self.respond, wsgi_environ(scope, body),
+            loop, send,
+        )
+
+    def respond(self, environ: Dict[str, Any],
+                loop: asyncio.AbstractEventLoop, send: Callable) -> None:
+        """Run the application and send its response from the loop."""
+        def send_message(message: Dict[str, Any]) -> None:
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        status, headers, result = self.start(environ)
+        try:
+            send_message({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': headers,
+            })
+            for chunk in result:
+                send_message({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+            send_message({'type': 'http.response.body', 'body': b''})
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+
+    def start(self, environ: Dict[str, Any]) -> Tuple[int, Headers,
+                                                      Iterator[bytes]]:
+        started = {}
+
+        def start_response(status: str, headers, exc_info=None) -> None:
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        return started['status'], started['headers'], result
+
+    @staticmethod
+    async def lifespan(receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
@@ -0,0 +1,30 @@
+"""Authentication backend caching the users of sessions.
+
+``AuthenticationMiddleware`` asks the backend for the session's user on
+every request. The backend keeps users in the ``users`` namespace of
+``core.cache``, and ``invalidate`` drops a user whenever the row is saved
+or deleted. A password change (which changes the session hash) or a
+deactivation therefore takes effect on the next request. Users are only
+cached when ``core.cache.shared()``, since the other workers would not
+see the invalidation.
+"""
+from django.contrib.auth.backends import ModelBackend
+
+from . import cache
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        if not cache.shared():
+            return super().get_user(user_id)
+        user = cache.users.get(str(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.users.set(str(user_id), user)
+        return user
+
+
+def invalidate(sender, instance, **kwargs) -> None:
+    """Drop the cached copy of a saved or deleted user."""
+    cache.users.delete(str(instance.pk))
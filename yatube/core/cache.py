@@ -0,0 +1,169 @@
+"""Versioned fragment cache with stampede protection.
+
+Every cached fragment depends on one or more *scopes* (``'posts'``,
+``'group:3'``...). Each scope has a version token in the cache; model
+signals bump the tokens, which invalidates every fragment built from an
+older version without deleting anything.
+
+Fragments are kept for a long time. When a fragment is stale, or is
+about to expire (probabilistic early recomputation, "XFetch"), a single
+request takes a short lock and renders it again while concurrent requests
+keep serving the previous copy.
+
+Keys are grouped in namespaces (``fragments``, ``versions``, ``locks``,
+``pages``, ``users``) whose default timeouts come from
+``settings.CACHE_NAMESPACE_TIMEOUTS``, so each kind of entry can be tuned
+without touching the callers.
+"""
+import hashlib
+import math
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.utils import make_template_fragment_key
+
+
+class Namespace:
+    """Prefixed view of a cache with its own default timeout."""
+
+    def __init__(self, name: str, alias: str = DEFAULT_CACHE_ALIAS) -> None:
+        self.name = name
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        timeouts = getattr(settings, 'CACHE_NAMESPACE_TIMEOUTS', {})
+        return timeouts.get(self.name, DEFAULT_TIMEOUT)
+
+    def key(self, key: str) -> str:
+        return f'{self.name}:{key}'
+
+    def _timeout(self, timeout):
+        return self.timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.cache.get(self.key(key), default)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = {self.key(key): key for key in keys}
+        found = self.cache.get_many(list(keys))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, key: str, value: Any, timeout=DEFAULT_TIMEOUT) -> None:
+        self.cache.set(self.key(key), value, self._timeout(timeout))
+
+    def set_many(self, data: Dict[str, Any], timeout=DEFAULT_TIMEOUT) -> None:
+        self.cache.set_many(
+            {self.key(key): value for key, value in data.items()},
+            self._timeout(timeout),
+        )
+
+    def add(self, key: str, value: Any, timeout=DEFAULT_TIMEOUT) -> bool:
+        return self.cache.add(self.key(key), value, self._timeout(timeout))
+
+    def incr(self, key: str, delta: int = 1) -> int:
+        return self.cache.incr(self.key(key), delta)
+
+    def delete(self, key: str) -> None:
+        self.cache.delete(self.key(key))
+
+
+fragments = Namespace('fragments')
+version_tokens = Namespace('versions')
+locks = Namespace('locks')
+pages = Namespace('pages')
+users = Namespace('users')
+
+
+def versions(*scopes: str) -> str:
+    """Combined version token of ``scopes``."""
+    tokens = version_tokens.get_many(scopes)
+    missing = {
+        scope: uuid.uuid4().hex for scope in scopes if scope not in tokens
+    }
+    if missing:
+        version_tokens.set_many(missing)
+        tokens.update(missing)
+    return '.'.join(tokens[scope] for scope in scopes)
+
+
+def bump(*scopes: str) -> None:
+    """Invalidate every fragment depending on any of ``scopes``."""
+    version_tokens.set_many({scope: uuid.uuid4().hex for scope in scopes})
+
+
+def shared() -> bool:
+    """Whether every worker process uses the same cache."""
+    return getattr(settings, 'CACHE_SHARED', False)
+
+
+def etag(request, *scopes: str) -> Optional[str]:
+    """Strong validator of a response built only from ``scopes``.
+
+    It changes with the scope versions, the full path (so cursors and
+    query parameters count) and the requesting user. Without a shared
+    cache there is no validator, since other workers would keep
+    answering with versions that are no longer current.
+    """
+    if not shared():
+        return None
+    key = '|'.join((
+        versions(*scopes), request.get_full_path(), str(request.user.pk)
+    ))
+    return '"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+
+
+def anonymous_page(key_func: Callable[..., str]):
+    """Let ``AnonymousPageCacheMiddleware`` cache a view for anonymous users.
+
+    ``key_func`` takes the view arguments like a ``condition`` ETag function
+    and returns the key of the cached page, usually that same ETag, or
+    ``None`` to skip the cache.
+    """
+    def decorator(view):
+        view.anonymous_page_key = key_func
+        return view
+    return decorator
+
+
+def _expired(expires: float, delta: float) -> bool:
+    beta = settings.FRAGMENT_CACHE_BETA
+    return time.time() - delta * beta * math.log(random.random()) >= expires
+
+
+def fragment(name: str, version: str, vary_on: Iterable,
+             render: Callable[[], str], timeout: int = None) -> str:
+    """Return the cached fragment, rendering it if stale."""
+    if timeout is None:
+        timeout = fragments.timeout
+    key = make_template_fragment_key(name, vary_on)
+    cached = fragments.get(key)
+    if cached is not None:
+        cached_version, expires, delta, content = cached
+        if cached_version == version and not _expired(expires, delta):
+            return content
+    if not locks.add(key, 1):
+        if cached is not None:
+            return cached[3]
+        return render()
+    try:
+        start = time.time()
+        content = render()
+        delta = time.time() - start
+        fragments.set(
+            key,
+            (version, time.time() + timeout, delta, content),
+            timeout * 2,
+        )
+        return content
+    finally:
+        locks.delete(key)
@@ -0,0 +1,181 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    'key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)'
+)
+CULL_EVERY = 100
+# SQLite limits the number of host parameters in a single statement.
+MAX_PARAMS = 900
+
+
+class SQLiteCache(BaseCache):
+    """Cache stored in one SQLite file shared by every worker process.
+
+    A local stand-in for memcached/Redis: all gunicorn workers on a host
+    see the same entries, so hit rates don't divide by the number of
+    workers and invalidation reaches all of them. The file is used in WAL
+    mode, so readers never wait for a writer.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]) -> None:
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _db(self) -> sqlite3.Connection:
+        pid = os.getpid()
+        if getattr(self._local, 'pid', None) != pid:
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = pid
+            self._local.writes = 0
+        return self._local.connection
+
+    def _expiry(self, timeout) -> Optional[float]:
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version=None) -> str:
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _maybe_cull(self, db: sqlite3.Connection) -> None:
+        self._local.writes += 1
+        if self._local.writes % CULL_EVERY:
+            return
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        (count,) = db.execute('SELECT COUNT(*) FROM cache').fetchone()
+        if count > self._max_entries:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                'SELECT key FROM cache ORDER BY rowid LIMIT ?)',
+                (count // self._cull_frequency,),
+            )
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._key(key, version)
+        db = self._db()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(
+                'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                (key, time.time()),
+            )
+            added = db.execute(
+                'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                 self._expiry(timeout)),
+            ).rowcount
+        return bool(added)
+
+    def get(self, key, default=None, version=None) -> Any:
+        key = self._key(key, version)
+        row = self._db().execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> None:
+        self.set_many({key: value}, timeout, version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self._key(key, version)
+        return bool(self._db().execute(
+            'UPDATE cache SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._expiry(timeout), key, time.time()),
+        ).rowcount)
+
+    def delete(self, key, version=None) -> bool:
+        key = self._key(key, version)
+        return bool(self._db().execute(
+            'DELETE FROM cache WHERE key = ?', (key,)
+        ).rowcount)
+
+    def has_key(self, key, version=None) -> bool:
+        return self.get(key, self, version) is not self
+
+    def incr(self, key, delta=1, version=None) -> int:
+        key = self._key(key, version)
+        db = self._db()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            db.execute(
+                'UPDATE cache SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key),
+            )
+        return value
+
+    def get_many(self, keys: Iterable, version=None) -> Dict[Any, Any]:
+        keys = {self._key(key, version): key for key in keys}
+        found = {}
+        names = list(keys)
+        db = self._db()
+        for start in range(0, len(names), MAX_PARAMS):
+            chunk = names[start:start + MAX_PARAMS]
+            rows = db.execute(
+                'SELECT key, value FROM cache WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))
+                ),
+                (*chunk, time.time()),
+            )
+            for name, value in rows:
+                found[keys[name]] = pickle.loads(value)
+        return found
+
+    def set_many(self, data: Dict[Any, Any], timeout=DEFAULT_TIMEOUT,
+                 version=None) -> List:
+        expires = self._expiry(timeout)
+        rows = [
+            (self._key(key, version),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             expires)
+            for key, value in data.items()
+        ]
+        db = self._db()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.executemany(
+                'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', rows
+            )
+            self._maybe_cull(db)
+        return []
+
+    def delete_many(self, keys: Iterable, version=None) -> None:
+        db = self._db()
+        with db:
+            db.execute('BEGIN IMMEDIATE')
+            db.executemany(
+                'DELETE FROM cache WHERE key = ?',
+                [(self._key(key, version),) for key in keys],
+            )
+
+    def clear(self) -> None:
+        self._db().execute('DELETE FROM cache')
+
+    def close(self, **kwargs) -> None:
+        """Keep the connection open between requests."""
@@ -0,0 +1,29 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite backend tuned for a single file shared by several workers.
+
+    ``OPTIONS['pragmas']`` are applied to every new connection, which with
+    ``CONN_MAX_AGE`` happens once per worker thread rather than once per
+    request. Transactions start with ``BEGIN IMMEDIATE``: a transaction
+    that read first and then tried to write would fail with "database is
+    locked" as soon as another writer committed, while an immediate one
+    waits its turn for up to the ``busy_timeout`` pragma. Readers are never
+    blocked in WAL mode.
+    """
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
+
+    def _start_transaction_under_autocommit(self) -> None:
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,134 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+from typing import Dict, List
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.asgi import WsgiToAsgi
+from posts.models import Group, Post
+
+
+def default_paths() -> List[str]:
+    """The index and the newest post, its group and its author pages."""
+    paths = [reverse('posts:index')]
+    post = Post.objects.select_related('author', 'group').first()
+    if post is not None:
+        paths += [
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+            reverse('posts:profile', kwargs={
+                'username': post.author.username
+            }),
+        ]
+    group = post.group if post and post.group else Group.objects.first()
+    if group is not None:
+        paths.append(reverse('posts:group_list', kwargs={'slug': group.slug}))
+    return paths
+
+
+def wsgi_request(application: WSGIHandler, path: str) -> float:
+    environ = {'PATH_INFO': path}
+    setup_testing_defaults(environ)
+    start = time.perf_counter()
+    result = application(environ, lambda status, headers: None)
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()
+    return time.perf_counter() - start
+
+
+async def asgi_request(application: WsgiToAsgi, path: str) -> float:
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'127.0.0.1')],
+        'server': ('127.0.0.1', 80),
+    }
+
+    async def receive() -> Dict:
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message: Dict) -> None:
+        pass
+
+    start = time.perf_counter()
+    await application(scope, receive, send)
+    return time.perf_counter() - start
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the throughput of the WSGI and ASGI entry points '
+        'under concurrent load.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--requests', type=int, default=500,
+            help='Requests sent through each entry point.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.ASGI_THREADS,
+            help='Requests in flight at once.',
+        )
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Paths requested in turn; defaults to the feed pages.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        paths = list(islice(
+            cycle(options['paths'] or default_paths()), options['requests']
+        ))
+        concurrency = options['concurrency']
+        wsgi = WSGIHandler()
+
+        self.report('wsgi', *self.run_wsgi(wsgi, paths, concurrency))
+        self.report('asgi', *self.run_asgi(
+            WsgiToAsgi(wsgi, concurrency), paths, concurrency
+        ))
+
+    @staticmethod
+    def run_wsgi(application: WSGIHandler, paths: List[str],
+                 concurrency: int):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(
+                lambda path: wsgi_request(application, path), paths
+            ))
+        return time.perf_counter() - start, timings
+
+    @staticmethod
+    def run_asgi(application: WsgiToAsgi, paths: List[str],
+                 concurrency: int):
+        async def run() -> List[float]:
+            slots = asyncio.Semaphore(concurrency)
+
+            async def request(path: str) -> float:
+                async with slots:
+                    return await asgi_request(application, path)
+
+            return await asyncio.gather(*map(request, paths))
+
+        start = time.perf_counter()
+        timings = asyncio.run(run())
+        application.executor.shutdown()
+        return time.perf_counter() - start, timings
+
+    def report(self, name: str, elapsed: float, timings: List[float]) -> None:
+        percentiles = statistics.quantiles(timings, n=20)
+        self.stdout.write(
+            f'{name}: {len(timings) / elapsed:.1f} req/s, '
+            f'p50 {percentiles[9] * 1000:.1f} ms, '
+            f'p95 {percentiles[18] * 1000:.1f} ms'
+        )
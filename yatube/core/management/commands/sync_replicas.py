@@ -0,0 +1,40 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def copy_database(source: str, target: str) -> None:
+    """Copy a live SQLite database with the online backup API."""
+    with closing(sqlite3.connect(source)) as primary, \
+            closing(sqlite3.connect(target)) as replica:
+        primary.backup(replica)
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the primary SQLite database into the read replicas, '
+        'standing in for replication in local setups.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Repeat every this many seconds instead of copying once.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        source = connections[DEFAULT_DB_ALIAS].settings_dict['NAME']
+        while True:
+            for alias in settings.DATABASE_REPLICAS:
+                copy_database(source, connections[alias].settings_dict['NAME'])
+            self.stdout.write(
+                f'Copied the primary into '
+                f'{len(settings.DATABASE_REPLICAS)} replicas.'
+            )
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
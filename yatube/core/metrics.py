@@ -0,0 +1,85 @@
+"""Per-request query and latency metrics.
+
+The metrics of the request being served live in a thread-local so the
+SQL execute wrapper and the template backend can add to them. Finished
+requests are aggregated per resolved view name in ``registry``.
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+UNRESOLVED = '<unresolved>'
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(Exception):
+    """A view issued more SQL queries than its configured budget."""
+
+
+class RequestMetrics:
+    """Query count and timings of a single request, in seconds."""
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.sql_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+
+    def sql_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting and timing SQL."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - start
+
+
+def current() -> Optional[RequestMetrics]:
+    """Metrics of the request served by this thread, if any."""
+    return getattr(_local, 'metrics', None)
+
+
+def activate(metrics: Optional[RequestMetrics]) -> None:
+    _local.metrics = metrics
+
+
+class Registry:
+    """Thread-safe aggregate of request metrics per view name."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._views: Dict[str, Dict[str, float]] = {}
+
+    def record(self, view_name: str, metrics: RequestMetrics) -> None:
+        with self._lock:
+            stats = self._views.setdefault(view_name, {
+                'requests': 0,
+                'queries': 0,
+                'max_queries': 0,
+                'sql_time': 0.0,
+                'render_time': 0.0,
+                'total_time': 0.0,
+                'max_total_time': 0.0,
+            })
+            stats['requests'] += 1
+            stats['queries'] += metrics.queries
+            stats['max_queries'] = max(stats['max_queries'], metrics.queries)
+            stats['sql_time'] += metrics.sql_time
+            stats['render_time'] += metrics.render_time
+            stats['total_time'] += metrics.total_time
+            stats['max_total_time'] = max(
+                stats['max_total_time'], metrics.total_time
+            )
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._views.items()}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._views.clear()
+
+
+registry = Registry()
@@ -0,0 +1,167 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+
+from . import cache, metrics, routers
+
+logger = logging.getLogger(__name__)
+
+
+def query_budget(view_name: str):
+    """Maximum number of SQL queries allowed for ``view_name``, if any."""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+class QueryMetricsMiddleware:
+    """Measure SQL queries, SQL time, render time and total time per view.
+
+    The numbers are added to the response as ``X-*`` and ``Server-Timing``
+    headers and aggregated per view name for the metrics endpoint. A view
+    going over its ``settings.QUERY_BUDGETS`` entry is logged, or raises
+    ``QueryBudgetExceeded`` when ``settings.QUERY_BUDGETS_STRICT`` is set.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        metrics.activate(request_metrics)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(
+                        request_metrics.sql_wrapper
+                    ))
+                response = self.get_response(request)
+        finally:
+            metrics.activate(None)
+        request_metrics.total_time = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else metrics.UNRESOLVED
+        metrics.registry.record(view_name, request_metrics)
+        self.add_headers(response, request_metrics)
+        self.check_budget(view_name, request_metrics)
+
+        return response
+
+    @staticmethod
+    def add_headers(response, request_metrics) -> None:
+        sql_ms = request_metrics.sql_time * 1000
+        render_ms = request_metrics.render_time * 1000
+        total_ms = request_metrics.total_time * 1000
+        response['X-Query-Count'] = str(request_metrics.queries)
+        response['X-SQL-Time'] = f'{sql_ms:.2f}'
+        response['X-Render-Time'] = f'{render_ms:.2f}'
+        response['X-Total-Time'] = f'{total_ms:.2f}'
+        response['Server-Timing'] = (
+            f'sql;dur={sql_ms:.2f}, render;dur={render_ms:.2f}, '
+            f'total;dur={total_ms:.2f}'
+        )
+
+    @staticmethod
+    def check_budget(view_name: str, request_metrics) -> None:
+        budget = query_budget(view_name)
+        if budget is None or request_metrics.queries <= budget:
+            return
+        message = (
+            f'{view_name} issued {request_metrics.queries} queries, '
+            f'budget is {budget}'
+        )
+        if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+            raise metrics.QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve whole pages to anonymous visitors from the cache.
+
+    Views opt in with ``core.cache.anonymous_page``. Requests carrying a
+    session cookie always reach the view, so a cached page never shows a
+    logged in header. The key is the page's version based ETag: the model
+    signals that invalidate the fragments also retire the cached pages,
+    and a hit costs no session, user or template work. Only responses that
+    set no cookies are stored.
+    """
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        key = self.page_key(request)
+        if key is None:
+            return self.get_response(request)
+        response = cache.pages.get(key)
+        if response is not None:
+            response = get_conditional_response(
+                request, etag=key, response=response
+            )
+            response['X-Page-Cache'] = 'hit'
+            return response
+        response = self.get_response(request)
+        if (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+        ):
+            cache.pages.set(key, response)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+    @staticmethod
+    def page_key(request):
+        if not cache.shared() or request.method not in ('GET', 'HEAD') or (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+        ):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        key_func = getattr(match.func, 'anonymous_page_key', None)
+        if key_func is None:
+            return None
+        request.resolver_match = match
+        request.user = AnonymousUser()
+        return key_func(request, *match.args, **match.kwargs)
+
+
+class ReplicaRoutingMiddleware:
+    """Route the reads of safe requests to the read replicas.
+
+    A request that writes sets the ``primary`` cookie, which sends the
+    client's requests to the primary until it expires.
+    """
+
+    cookie_name = 'primary'
+
+    def __init__(self, get_response) -> None:
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.activate(
+            request.method in ('GET', 'HEAD', 'OPTIONS')
+            and self.cookie_name not in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            wrote = routers.deactivate()
+        if wrote and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                self.cookie_name,
+                '1',
+                max_age=settings.REPLICA_STICKINESS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
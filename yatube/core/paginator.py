@@ -0,0 +1,138 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Max, Q
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+NEXT = 'n'
+PREVIOUS = 'p'
+# Filtered counts of EstimatedCountPaginator stop at this many rows.
+COUNT_LIMIT = 10000
+
+
+class CursorPaginator(Paginator):
+    """Keyset paginator ordered by ``(key, pk)`` descending.
+
+    Pages are addressed by opaque ``?cursor=`` tokens instead of numbers,
+    so neither ``COUNT(*)`` nor ``OFFSET`` is issued and a deep page costs
+    the same as the first one. The page number is carried inside the token
+    for display only.
+    """
+
+    def __init__(self, object_list, per_page, key: str = 'pub_date') -> None:
+        super().__init__(object_list, per_page)
+        self.key = key
+        self._num_pages = 1
+
+    @property
+    def num_pages(self) -> int:
+        """Pages known so far: the current one and the next, if any."""
+        return self._num_pages
+
+    def encode_cursor(self, obj: Any, direction: str, number: int) -> str:
+        value = getattr(obj, self.key)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = json.dumps([value, obj.pk, direction, number])
+        return urlsafe_base64_encode(payload.encode())
+
+    def decode_cursor(self, cursor: str) -> Tuple[Any, int, str, int]:
+        value, pk, direction, number = json.loads(
+            urlsafe_base64_decode(cursor)
+        )
+        if direction not in (NEXT, PREVIOUS):
+            raise ValueError('Unknown cursor direction.')
+        return self.to_python(value), int(pk), direction, int(number)
+
+    def to_python(self, value: Any) -> Any:
+        """Convert a key value read from a cursor."""
+        field = self.object_list.model._meta.get_field(self.key)
+        return field.to_python(value)
+
+    def keyset(self, queryset, position: Optional[Tuple[Any, int]],
+               reverse: bool = False, tiebreak: str = 'pk'):
+        """Order ``queryset`` by the page key and skip past ``position``.
+
+        Rows come in feed order (newest first) unless ``reverse`` is set,
+        in which case the ones preceding ``position`` are returned oldest
+        first.
+        """
+        key = self.key
+        if position is not None:
+            value, pk = position
+            op = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{key}__{op}': value})
+                | Q(**{key: value, f'{tiebreak}__{op}': pk})
+            )
+        if reverse:
+            return queryset.order_by(key, tiebreak)
+        return queryset.order_by(f'-{key}', f'-{tiebreak}')
+
+    def fetch(self, position: Optional[Tuple[Any, int]],
+              reverse: bool = False) -> List[Any]:
+        """Return up to ``per_page + 1`` objects following ``position``."""
+        queryset = self.keyset(self.object_list, position, reverse)
+        return list(queryset[:self.per_page + 1])
+
+    def get_page(self, cursor: Optional[str]) -> Page:
+        """Return the page addressed by ``cursor``.
+
+        A missing or malformed cursor, or one past either end of the
+        list, yields the first page.
+        """
+        position, direction, number = None, NEXT, 1
+        if cursor:
+            try:
+                value, pk, direction, number = self.decode_cursor(cursor)
+                position = (value, pk)
+            except (TypeError, ValueError, ValidationError):
+                position, direction, number = None, NEXT, 1
+        reverse = direction == PREVIOUS
+        objects = self.fetch(position, reverse)
+        if position is not None and not objects:
+            return self.get_page(None)
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if reverse:
+            objects.reverse()
+            has_previous, has_next = has_more, True
+            number = max(number, 2) if has_more else 1
+        else:
+            has_previous, has_next = position is not None, has_more
+            number = max(number, 2) if has_previous else 1
+        self._num_pages = number + 1 if has_next else number
+        page = self._get_page(objects, number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if has_next and objects:
+            page.next_cursor = self.encode_cursor(
+                objects[-1], NEXT, number + 1
+            )
+        if has_previous and objects:
+            page.previous_cursor = self.encode_cursor(
+                objects[0], PREVIOUS, number - 1
+            )
+        return page
+
+
+class EstimatedCountPaginator(Paginator):
+    """Numbered paginator that never counts a whole large table.
+
+    An unfiltered queryset is estimated by its largest primary key, one
+    index lookup that overestimates by the number of deleted rows. A
+    filtered one is counted up to ``COUNT_LIMIT`` rows. Trailing pages may
+    therefore be empty, which an admin changelist tolerates.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not queryset.query.where:
+            return queryset.model._default_manager.aggregate(
+                estimate=Max('pk')
+            )['estimate'] or 0
+        return queryset[:COUNT_LIMIT].count()
@@ -0,0 +1,54 @@
+"""Read replica routing with read-your-writes stickiness.
+
+``ReplicaRouter`` sends reads to one of ``settings.DATABASE_REPLICAS`` only
+while ``ReplicaRoutingMiddleware`` has enabled them for the request served
+by the current thread, which it does for safe methods. Every other read,
+including those of management commands and background threads, goes to
+the primary. A write sends the remaining reads of the request to the
+primary, and the middleware keeps the client on the primary for
+``settings.REPLICA_STICKINESS`` seconds, so a user who posted or commented
+sees it even while the replicas lag. A request reads from a single
+replica, chosen when it starts, so all of its queries see the same
+replication point.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+_local = threading.local()
+
+
+def activate(use_replicas: bool) -> None:
+    """Start routing the reads of the current request."""
+    replicas = settings.DATABASE_REPLICAS
+    _local.replica = (
+        random.choice(replicas) if use_replicas and replicas else None
+    )
+    _local.wrote = False
+
+
+def deactivate() -> bool:
+    """Stop routing to the replicas; return whether the request wrote."""
+    wrote = getattr(_local, 'wrote', False)
+    activate(False)
+    return wrote
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints) -> str:
+        return getattr(_local, 'replica', None) or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints) -> str:
+        _local.replica = None
+        _local.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        """Replicas hold the same rows as the primary."""
+        return True
+
+    def allow_migrate(self, db, app_label, **hints) -> bool:
+        """Replicas get their schema by replication."""
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,149 @@
+"""Sessions served from the cache and written to the database behind it.
+
+Like Django's ``cached_db`` engine, a session is read from the cache and
+only falls back to the database on a miss. A changed session is written
+to the cache at once; its database row is queued once the transaction
+commits and written by a background thread, which coalesces repeated
+changes of the same session. New sessions, logins, logouts and password
+changes are still written through, so a session key is never handed out
+twice and every worker agrees on who is logged in. A session whose data
+is unchanged since it was loaded is not saved at all. Queued rows are
+written when the process exits.
+
+The cache is only used when ``core.cache.shared()``. With a cache per
+worker, a logout in one worker would leave the session alive in the
+others, so sessions are then read from and written to the database like
+Django's ``db`` engine does.
+"""
+import atexit
+import copy
+import logging
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY,
+)
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore,
+)
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.db import connections, router, transaction
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+AUTH_KEYS = (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+# Session rows waiting for the database, by session key.
+_pending: Dict[str, object] = {}
+
+
+def executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='sessions'
+            )
+        return _executor
+
+
+def flush() -> int:
+    """Write every queued session row; return how many were written.
+
+    Each row is written under the lock, so a session deleted meanwhile
+    can't be brought back by its queued row.
+    """
+    written = 0
+    while True:
+        with _lock:
+            if not _pending:
+                return written
+            obj = _pending.pop(next(iter(_pending)))
+            try:
+                obj.save(using=router.db_for_write(type(obj), instance=obj))
+                written += 1
+            except Exception:
+                logger.exception('Session %s not saved', obj.session_key)
+
+
+atexit.register(flush)
+
+
+def _flush() -> None:
+    try:
+        flush()
+    finally:
+        connections.close_all()
+
+
+def _enqueue(obj) -> None:
+    with _lock:
+        scheduled = bool(_pending)
+        _pending[obj.session_key] = obj
+    if not scheduled:
+        executor().submit(_flush)
+
+
+class SessionStore(CachedDBStore):
+    cache_key_prefix = 'core.session_backends'
+
+    def __init__(self, session_key=None) -> None:
+        super().__init__(session_key)
+        self._loaded = None
+
+    def exists(self, session_key: str) -> bool:
+        if not cache.shared():
+            return DBStore.exists(self, session_key)
+        return super().exists(session_key)
+
+    def load(self):
+        if cache.shared():
+            data = super().load()
+        else:
+            data = DBStore.load(self)
+        self._loaded = copy.deepcopy(data)
+        return data
+
+    def save(self, must_create: bool = False) -> None:
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and data == self._loaded:
+            return
+        if not cache.shared():
+            DBStore.save(self, must_create)
+        elif must_create or self._changes_user(data):
+            with _lock:
+                _pending.pop(self.session_key, None)
+                super().save(must_create)
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+            obj = self.create_model_instance(data)
+            transaction.on_commit(lambda: _enqueue(obj))
+        self._loaded = copy.deepcopy(data)
+
+    def _changes_user(self, data) -> bool:
+        """Whether ``data`` logs a user in or out, or changes the password.
+
+        Those changes are written through, so every worker sees them on
+        the very next request.
+        """
+        loaded = self._loaded or {}
+        return any(data.get(key) != loaded.get(key) for key in AUTH_KEYS)
+
+    def delete(self, session_key: Optional[str] = None) -> None:
+        if session_key is None:
+            session_key = self.session_key
+        if session_key is None:
+            return
+        if not cache.shared():
+            return DBStore.delete(self, session_key)
+        with _lock:
+            _pending.pop(session_key, None)
+            super().delete(session_key)
@@ -0,0 +1,72 @@
+"""Russian Porter stemmer.
+
+Search indexes the stems of words instead of the words themselves, so
+``котики``, ``котиков`` and ``котиками`` all match each other. Words
+without Cyrillic letters are only lowercased.
+"""
+import re
+from typing import List
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word: str) -> str:
+    """Stem of a single word."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if not CYRILLIC.search(word) or match is None:
+        return word
+    start, rv = match.groups()
+
+    ending = PERFECTIVE_GERUND.sub('', rv, 1)
+    if ending != rv:
+        rv = ending
+    else:
+        rv = REFLEXIVE.sub('', rv, 1)
+        ending = ADJECTIVE.sub('', rv, 1)
+        if ending != rv:
+            rv = PARTICIPLE.sub('', ending, 1)
+        else:
+            ending = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if ending == rv else ending
+
+    if rv.endswith('и'):
+        rv = rv[:-1]
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_ENDING.sub('', rv, 1)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        if rv.endswith('нн'):
+            rv = rv[:-1]
+    return start + rv
+
+
+def stems(text: str) -> List[str]:
+    """Stems of every word of ``text``, in order."""
+    return [stem(word) for word in WORD.findall(text)]
@@ -0,0 +1,40 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+
+from . import metrics
+
+
+class TimedTemplate(Template):
+    """Template adding its render time to the current request metrics."""
+
+    def render(self, context=None, request=None) -> str:
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            request_metrics = metrics.current()
+            if request_metrics is not None:
+                request_metrics.render_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose top-level renders are timed.
+
+    Included templates are rendered inside their parent, so their time is
+    counted once, as part of the template that the view rendered.
+    """
+
+    def from_string(self, template_code) -> TimedTemplate:
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name) -> TimedTemplate:
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,122 @@
+"""Template loader for production workers.
+
+``Loader`` is Django's cached loader: every template is read and parsed
+once per process. On load it also replaces each ``{% include %}`` of a
+template listed in ``settings.TEMPLATE_INLINED_INCLUDES`` with the parsed
+include itself, so a feed card rendered in a loop no longer resolves,
+looks up and wraps its template on every iteration. An inlined include
+keeps the context handling of ``{% include %}``, ``with`` and ``only``
+included. ``warm`` parses every template when a worker starts.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+from django.template.base import Node
+from django.template.defaulttags import IfNode
+from django.template.loader_tags import IncludeNode
+from django.template.loaders import cached
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt')
+
+
+class InlinedIncludeNode(Node):
+    """``{% include %}`` of a template parsed when the parent was loaded."""
+
+    child_nodelists = ()
+
+    def __init__(self, include: IncludeNode, template) -> None:
+        self.template = template
+        self.extra_context = include.extra_context
+        self.isolated_context = include.isolated_context
+        self.token = include.token
+        self.origin = include.origin
+
+    def render(self, context) -> str:
+        values = {
+            name: var.resolve(context)
+            for name, var in self.extra_context.items()
+        }
+        with context.render_context.push_state(self.template):
+            if self.isolated_context:
+                return self.template.nodelist.render(context.new(values))
+            with context.push(**values):
+                return self.template.nodelist.render(context)
+
+
+def _included_name(node: IncludeNode):
+    """Name of the included template if it is a plain string literal."""
+    expression = node.template
+    if isinstance(expression.var, str) and not expression.filters:
+        return expression.var
+    return None
+
+
+def _nodelists(node: Node):
+    if isinstance(node, IfNode):
+        return [nodelist for _, nodelist in node.conditions_nodelists]
+    return [
+        getattr(node, name) for name in node.child_nodelists
+        if getattr(node, name, None) is not None
+    ]
+
+
+class Loader(cached.Loader):
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if not getattr(template, 'includes_inlined', False):
+            template.includes_inlined = True
+            self.inline(template.nodelist)
+        return template
+
+    def inline(self, nodelist) -> None:
+        for index, node in enumerate(nodelist):
+            if isinstance(node, IncludeNode):
+                name = _included_name(node)
+                if name in settings.TEMPLATE_INLINED_INCLUDES:
+                    nodelist[index] = InlinedIncludeNode(
+                        node, self.get_template(name)
+                    )
+                continue
+            for child in _nodelists(node):
+                self.inline(child)
+
+
+def warm() -> int:
+    """Parse every template of the engines using ``Loader``.
+
+    Returns the number of templates parsed; templates that don't compile
+    on their own are logged and skipped.
+    """
+    parsed = 0
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is None:
+            continue
+        for loader in engine.template_loaders:
+            if not isinstance(loader, Loader):
+                continue
+            for name in _template_names(loader):
+                try:
+                    loader.get_template(name)
+                except (TemplateSyntaxError, UnicodeDecodeError):
+                    logger.warning('Template %s not parsed', name)
+                    continue
+                parsed += 1
+    return parsed
+
+
+def _template_names(loader: Loader):
+    names = set()
+    for inner in loader.loaders:
+        for directory in getattr(inner, 'get_dirs', list)():
+            for root, _, files in os.walk(directory):
+                for file in files:
+                    if file.endswith(TEMPLATE_SUFFIXES):
+                        names.add(os.path.relpath(
+                            os.path.join(root, file), directory
+                        ).replace(os.sep, '/'))
+    return sorted(names)
@@ -0,0 +1,49 @@
+from django import template
+
+from core import cache
+
+register = template.Library()
+
+
+class VersionedCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, version, vary_on) -> None:
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.version = version
+        self.vary_on = vary_on
+
+    def render(self, context) -> str:
+        return cache.fragment(
+            self.fragment_name,
+            str(self.version.resolve(context)),
+            [var.resolve(context) for var in self.vary_on],
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag('versioned_cache')
+def do_versioned_cache(parser, token) -> VersionedCacheNode:
+    """Cache a fragment until the version of its scopes changes.
+
+    Usage::
+
+        {% versioned_cache fragment_name version [var1] [var2] .. %}
+            .. some expensive processing ..
+        {% endversioned_cache %}
+
+    ``version`` is normally computed by the view with
+    ``core.cache.versions()``.
+    """
+    nodelist = parser.parse(('endversioned_cache',))
+    parser.delete_first_token()
+    tokens = token.split_contents()
+    if len(tokens) < 3:
+        raise template.TemplateSyntaxError(
+            f'{tokens[0]!r} tag requires at least 2 arguments.'
+        )
+    return VersionedCacheNode(
+        nodelist,
+        tokens[1],
+        parser.compile_filter(tokens[2]),
+        [parser.compile_filter(t) for t in tokens[3:]],
+    )
@@ -0,0 +1,16 @@
+from .middleware import query_budget
+
+
+class QueryBudgetMixin:
+    """``TestCase`` mixin checking responses against ``QUERY_BUDGETS``."""
+
+    def assertWithinQueryBudget(self, response) -> None:
+        view_name = response.resolver_match.view_name
+        budget = query_budget(view_name)
+        self.assertIsNotNone(budget, f'No query budget for {view_name}.')
+        queries = int(response['X-Query-Count'])
+        self.assertLessEqual(
+            queries,
+            budget,
+            f'{view_name} issued {queries} queries, budget is {budget}.',
+        )
@@ -1,6 +1,41 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import closing
 from http import HTTPStatus
+from unittest import mock
 
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Engine
+from django.test import (
+    RequestFactory, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+from . import cache as fragment_cache
+from . import session_backends
+from .asgi import WsgiToAsgi, wsgi_environ
+from .management.commands.sync_replicas import copy_database
+from .cache_backends import SQLiteCache
+from .metrics import QueryBudgetExceeded, registry
+from .middleware import ReplicaRoutingMiddleware
+from .routers import ReplicaRouter
+from .session_backends import SessionStore
+from .template_loaders import InlinedIncludeNode, warm
+
+User = get_user_model()
 
 
 class ViewTestClass(TestCase):
@@ -9,3 +44,520 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class QueryMetricsTests(TestCase):
+    def setUp(self) -> None:
+        registry.reset()
+
+    def test_response_has_metrics_headers(self) -> None:
+        response = self.client.get('/about/author/')
+
+        for header in ('X-Query-Count', 'X-SQL-Time', 'X-Render-Time',
+                       'X-Total-Time', 'Server-Timing'):
+            with self.subTest(header=header):
+                self.assertIn(header, response)
+
+    def test_metrics_are_aggregated_per_view(self) -> None:
+        self.client.get('/about/author/')
+        self.client.get('/about/author/')
+        self.client.force_login(
+            User.objects.create_user(username='staff', is_staff=True)
+        )
+        response = self.client.get(reverse('core:metrics'))
+        views = response.json()['views']
+
+        self.assertEqual(views['about:author']['requests'], 2)
+
+    @override_settings(DEBUG=False)
+    def test_metrics_endpoint_requires_staff(self) -> None:
+        response = self.client.get(reverse('core:metrics'))
+
+        self.assertEqual(response.status_code, HTTPStatus.FORBIDDEN)
+
+    @override_settings(
+        QUERY_BUDGETS={'about:author': -1}, QUERY_BUDGETS_STRICT=True
+    )
+    def test_strict_budget_raises(self) -> None:
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get('/about/author/')
+
+
+class FragmentCacheTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.renders = 0
+
+    def render(self) -> str:
+        self.renders += 1
+        return f'render {self.renders}'
+
+    def test_fragment_is_cached_until_version_changes(self) -> None:
+        version = fragment_cache.versions('scope')
+        first = fragment_cache.fragment('name', version, [], self.render)
+        second = fragment_cache.fragment('name', version, [], self.render)
+        fragment_cache.bump('scope')
+        third = fragment_cache.fragment(
+            'name', fragment_cache.versions('scope'), [], self.render
+        )
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertEqual(self.renders, 2)
+
+    def test_stale_fragment_is_served_while_locked(self) -> None:
+        version = fragment_cache.versions('scope')
+        first = fragment_cache.fragment('name', version, [], self.render)
+        fragment_cache.bump('scope')
+        fragment_cache.locks.add(make_template_fragment_key('name', []), 1)
+        stale = fragment_cache.fragment(
+            'name', fragment_cache.versions('scope'), [], self.render
+        )
+
+        self.assertEqual(stale, first)
+        self.assertEqual(self.renders, 1)
+
+    def test_fragment_is_recomputed_early(self) -> None:
+        version = fragment_cache.versions('scope')
+        content = fragment_cache.fragment('name', version, [], self.render)
+        key = make_template_fragment_key('name', [])
+        fragment_cache.fragments.set(
+            key, (version, time.time() + 1, 10.0, content)
+        )
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            fragment_cache.fragment('name', version, [], self.render)
+
+        self.assertEqual(self.renders, 2)
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_entries_are_shared_between_instances(self) -> None:
+        other_worker = SQLiteCache(self.path, {})
+        self.cache.set('key', {'value': 1})
+
+        self.assertEqual(other_worker.get('key'), {'value': 1})
+        other_worker.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expired_entries_are_missing(self) -> None:
+        self.cache.set('key', 'value', 60)
+        with mock.patch('core.cache_backends.time.time',
+                        return_value=time.time() + 61):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new value'))
+
+    def test_add_and_incr(self) -> None:
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 10))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_many(self) -> None:
+        self.cache.set_many({'a': 1, 'b': 2}, None)
+        self.cache.delete_many(['b'])
+
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'a': 1})
+
+
+class CacheNamespaceTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    @override_settings(CACHE_NAMESPACE_TIMEOUTS={'short': 30})
+    def test_namespace_timeout_is_the_default(self) -> None:
+        namespace = fragment_cache.Namespace('short')
+        with mock.patch.object(cache, 'set') as cache_set:
+            namespace.set('key', 'value')
+            namespace.set('other', 'value', None)
+
+        cache_set.assert_any_call('short:key', 'value', 30)
+        cache_set.assert_any_call('short:other', 'value', None)
+
+    def test_namespaces_do_not_collide(self) -> None:
+        first = fragment_cache.Namespace('first')
+        second = fragment_cache.Namespace('second')
+        first.set('key', 1)
+        second.set('key', 2)
+
+        self.assertEqual(first.get_many(['key']), {'key': 1})
+        self.assertEqual(second.get('key'), 2)
+
+
+@override_settings(CACHE_SHARED=True)
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.create(author=cls.author, text='First post')
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.url = reverse('posts:index')
+
+    def test_anonymous_page_is_served_from_cache(self) -> None:
+        miss = self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            hit = self.client.get(self.url)
+
+        self.assertEqual(miss['X-Page-Cache'], 'miss')
+        self.assertEqual(hit['X-Page-Cache'], 'hit')
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(len(queries), 0)
+
+    def test_hit_answers_conditional_request(self) -> None:
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+
+    def test_model_changes_retire_cached_pages(self) -> None:
+        self.client.get(self.url)
+        Post.objects.create(author=self.author, text='Second post')
+        response = self.client.get(self.url)
+
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Second post')
+
+    def test_session_cookie_bypasses_cache(self) -> None:
+        self.client.get(self.url)
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Пользователь: author')
+
+    @override_settings(CACHE_SHARED=False)
+    def test_per_process_cache_is_not_used(self) -> None:
+        self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertNotIn('X-Page-Cache', response)
+
+    def test_query_parameters_are_part_of_the_key(self) -> None:
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'cursor': ''})
+
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+
+
+class WsgiToAsgiTests(TestCase):
+    def request(self, path: str, wsgi_application=None) -> list:
+        application = WsgiToAsgi(
+            wsgi_application or WSGIHandler(), threads=2
+        )
+        messages = []
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+
+        async def receive() -> dict:
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message: dict) -> None:
+            messages.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        application.executor.shutdown()
+        return messages
+
+    def test_response_is_sent_through_asgi(self) -> None:
+        messages = self.request('/about/author/')
+        body = b''.join(
+            message.get('body', b'') for message in messages[1:]
+        )
+
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        self.assertIn((b'x-query-count', b'0'), messages[0]['headers'])
+        self.assertFalse(messages[-1].get('more_body', False))
+        self.assertIn(b'</html>', body)
+
+    def test_request_stays_on_one_thread(self) -> None:
+        threads = set()
+
+        class Result:
+            def __iter__(self):
+                for chunk in (b'a', b'b'):
+                    threads.add(threading.get_ident())
+                    yield chunk
+
+            def close(self) -> None:
+                threads.add(threading.get_ident())
+
+        def wsgi_application(environ, start_response):
+            threads.add(threading.get_ident())
+            start_response('200 OK', [])
+            return Result()
+
+        messages = self.request('/', wsgi_application)
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotIn(threading.get_ident(), threads)
+        self.assertEqual(
+            [message.get('body') for message in messages[1:]],
+            [b'a', b'b', b''],
+        )
+
+    def test_environ_maps_headers_and_paths(self) -> None:
+        environ = wsgi_environ({
+            'method': 'POST',
+            'path': '/app/posts/1/',
+            'root_path': '/app',
+            'query_string': b'a=1',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'accept', b'text/html'),
+                (b'accept', b'*/*'),
+            ],
+        }, None)
+
+        self.assertEqual(environ['SCRIPT_NAME'], '/app')
+        self.assertEqual(environ['PATH_INFO'], '/posts/1/')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+
+
+class SQLiteBackendTests(TransactionTestCase):
+    def test_pragmas_are_applied(self) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size')
+            cache_size = cursor.fetchone()[0]
+
+        self.assertEqual(synchronous, 1)
+        self.assertEqual(cache_size, -64000)
+
+    def test_transactions_take_the_write_lock_first(self) -> None:
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                User.objects.create_user(username='writer')
+
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self) -> None:
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def serve(self, request, write: bool = False):
+        """Serve ``request``, returning the response and the read alias."""
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return response, reads[0]
+
+    def test_safe_requests_read_from_replicas(self) -> None:
+        response, alias = self.serve(self.factory.get('/'))
+
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn('primary', response.cookies)
+
+    @override_settings(DATABASE_REPLICAS=[f'replica{i}' for i in range(8)])
+    def test_request_reads_from_one_replica(self) -> None:
+        def view(request):
+            return HttpResponse(' '.join(
+                self.router.db_for_read(Post) for _ in range(20)
+            ))
+
+        response = ReplicaRoutingMiddleware(view)(self.factory.get('/'))
+
+        self.assertEqual(len(set(response.content.split())), 1)
+
+    def test_reads_outside_requests_use_primary(self) -> None:
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writes_pin_the_client_to_primary(self) -> None:
+        response, alias = self.serve(self.factory.post('/'), write=True)
+        self.assertEqual(alias, 'default')
+        self.assertIn('primary', response.cookies)
+
+        request = self.factory.get('/')
+        request.COOKIES['primary'] = '1'
+        _, alias = self.serve(request)
+
+        self.assertEqual(alias, 'default')
+
+    def test_reads_after_a_write_use_primary(self) -> None:
+        response, alias = self.serve(self.factory.get('/'), write=True)
+
+        self.assertEqual(alias, 'default')
+        self.assertIn('primary', response.cookies)
+
+    def test_copy_database_copies_the_primary(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            with closing(sqlite3.connect(primary)) as db, db:
+                db.execute('CREATE TABLE item (name TEXT)')
+                db.execute("INSERT INTO item VALUES ('copied')")
+
+            copy_database(primary, replica)
+
+            with closing(sqlite3.connect(replica)) as db:
+                rows = db.execute('SELECT name FROM item').fetchall()
+        self.assertEqual(rows, [('copied',)])
+
+
+@override_settings(CACHE_SHARED=True)
+class SessionBackendTests(TransactionTestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        self.user = User.objects.create_user(username='user')
+        submit = mock.patch.object(session_backends, 'executor')
+        self.executor = submit.start()
+        self.addCleanup(submit.stop)
+
+    def stored(self, session_key: str) -> dict:
+        return SessionStore().decode(Session.objects.get(
+            session_key=session_key
+        ).session_data)
+
+    def test_authenticated_requests_skip_session_and_user_rows(self) -> None:
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:follow_index'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(response.context['user'], self.user)
+        for query in queries:
+            self.assertNotIn('FROM "django_session"', query['sql'])
+            self.assertNotIn('FROM "auth_user"', query['sql'])
+
+    def test_changes_are_written_behind(self) -> None:
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.create()
+        session_key = session.session_key
+        session = SessionStore(session_key)
+        session['theme'] = 'light'
+        session.save()
+
+        self.assertEqual(SessionStore(session_key)['theme'], 'light')
+        self.assertEqual(self.stored(session_key)['theme'], 'dark')
+        self.assertEqual(session_backends.flush(), 1)
+        self.assertEqual(self.stored(session_key)['theme'], 'light')
+        self.executor().submit.assert_called_once()
+
+    def test_unchanged_session_is_not_saved(self) -> None:
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.create()
+        session = SessionStore(session.session_key)
+        session['theme'] = 'dark'
+
+        with self.assertNumQueries(0):
+            session.save()
+        self.assertEqual(session_backends.flush(), 0)
+
+    def test_deleted_session_is_not_written_back(self) -> None:
+        session = SessionStore()
+        session.create()
+        session['theme'] = 'dark'
+        session.save()
+        session.delete()
+
+        self.assertEqual(session_backends.flush(), 0)
+        self.assertFalse(Session.objects.exists())
+
+    def test_password_change_ends_cached_sessions(self) -> None:
+        self.client.force_login(self.user)
+        self.client.get(reverse('posts:follow_index'))
+        self.user.set_password('new password')
+        self.user.save()
+
+        response = self.client.get(reverse('posts:follow_index'))
+
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_per_process_cache_falls_back_to_database(self) -> None:
+        session = SessionStore()
+        session['theme'] = 'dark'
+        session.create()
+        session['theme'] = 'light'
+        session.save()
+
+        self.assertEqual(self.stored(session.session_key)['theme'], 'light')
+        self.assertEqual(session_backends.flush(), 0)
+        Session.objects.all().delete()
+        self.assertNotIn('theme', SessionStore(session.session_key))
+
+
+@override_settings(TEMPLATE_INLINED_INCLUDES=['card.html'])
+class TemplateLoaderTests(TestCase):
+    templates = {
+        'page.html': (
+            '{% for n in items %}{% if n %}'
+            '{% include "card.html" with shown=n %}{% endif %}{% endfor %}'
+            '|{% include "card.html" with shown=0 only %}'
+            '|{% include "other.html" %}'
+        ),
+        'card.html': '<{{ shown }}{{ label }}>',
+        'other.html': '{{ label }}',
+    }
+
+    def setUp(self) -> None:
+        self.sources = dict(self.templates)
+        self.engine = Engine(loaders=[('core.template_loaders.Loader', [
+            ('django.template.loaders.locmem.Loader', self.sources),
+        ])])
+
+    def test_inlined_includes_render_like_includes(self) -> None:
+        template = self.engine.get_template('page.html')
+        context = Context({'items': [1, 0, 2], 'label': 'x'})
+
+        self.assertEqual(template.render(context), '<1x><2x>|<0>|x')
+        self.assertEqual(
+            len(template.nodelist.get_nodes_by_type(
+                InlinedIncludeNode
+            )),
+            2,
+        )
+
+    def test_templates_are_parsed_once(self) -> None:
+        self.engine.get_template('page.html')
+        self.sources['card.html'] = 'changed'
+
+        self.assertNotIn('changed', self.engine.get_template(
+            'page.html'
+        ).render(Context({'items': [1]})))
+
+    def test_warm_parses_every_template(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, 'includes'))
+            for name in ('base.html', 'includes/card.html'):
+                with open(os.path.join(directory, name), 'w') as file:
+                    file.write('{{ value }}')
+            with override_settings(TEMPLATES=[{
+                'BACKEND': 'django.template.backends.django.'
+                           'DjangoTemplates',
+                'OPTIONS': {'loaders': [(
+                    'core.template_loaders.Loader',
+                    [('django.template.loaders.filesystem.Loader',
+                      [directory])],
+                )]},
+            }]):
+                self.assertEqual(warm(), 2)
@@ -1,5 +1,13 @@
+import os
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from .metrics import registry
+from .middleware import query_budget
+
 
 def page_not_found(request, exception):
     return render(request, 'core/404.html', {'path': request.path}, status=404)
@@ -15,3 +23,13 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Per-view query and latency aggregates of this process."""
+    if not (settings.DEBUG or request.user.is_staff):
+        raise PermissionDenied
+    views = registry.snapshot()
+    for name, stats in views.items():
+        stats['budget'] = query_budget(name)
+    return JsonResponse({'pid': os.getpid(), 'views': views})
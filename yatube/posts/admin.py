@@ -1,9 +1,87 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db.models.functions import Substr
 
-from .models import Comment, Follow, Group, Post
+from core.paginator import EstimatedCountPaginator
 
+from . import search
+from .models import Comment, Follow, Group, ModerationJob, Post
 
-class PostAdmin(admin.ModelAdmin):
+# Characters of the text shown in the Post and Comment changelists.
+TEXT_PREVIEW_LENGTH = 80
+
+
+class IndexedSearchMixin:
+    """Search the changelist through the full-text index, not ``LIKE``.
+
+    ``search_fields`` only switches the admin search box on.
+    """
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search.filter_matching(queryset, search_term), False
+
+
+class PreviewChangeList(ChangeList):
+    """Changelist loading only the start of ``text``.
+
+    The preview replaces ``text`` on the listed objects, so the ``text``
+    column shows it without a query per row.
+    """
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('text').annotate(
+            text_preview=Substr('text', 1, TEXT_PREVIEW_LENGTH)
+        )
+
+    def get_results(self, request):
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        for obj in self.result_list:
+            obj.text = obj.text_preview
+
+
+class LargeTableMixin:
+    """Changelist of a table with millions of rows.
+
+    Counts are estimated (``EstimatedCountPaginator``), the unfiltered
+    total isn't counted a second time, and the ``text`` column shows the
+    start of the text without loading the rest.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return PreviewChangeList
+
+
+def moderate_authors(action: str):
+    """Admin action queueing a job over everything by the selected authors.
+
+    The job matches every post or comment of those authors, not only the
+    selected rows.
+    """
+    def queue(modeladmin, request, queryset) -> None:
+        authors = queryset.order_by().values_list(
+            'author_id', flat=True
+        ).distinct()
+        for author_id in authors:
+            ModerationJob.objects.create(
+                action=action, author_id=author_id, created_by=request.user
+            )
+        modeladmin.message_user(
+            request, f'Queued {len(authors)} moderation jobs.'
+        )
+    queue.__name__ = f'{action}_by_authors'
+    queue.short_description = (
+        f'{dict(ModerationJob.ACTIONS)[action]} of the selected authors'
+    )
+    return queue
+
+
+class PostAdmin(LargeTableMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -12,9 +90,12 @@ class PostAdmin(admin.ModelAdmin):
         'group',
         'image',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    actions = (moderate_authors(ModerationJob.DELETE_POSTS),)
     empty_value_display = '-пусто-'
 
 
@@ -25,10 +106,11 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description'
     )
+    search_fields = ('title',)
     prepopulated_fields = {'slug': ('title',)}
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = (
         'pk',
         'text',
@@ -36,8 +118,11 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
         'created'
     )
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'author')
     search_fields = ('text',)
     list_filter = ('created',)
+    actions = (moderate_authors(ModerationJob.DELETE_COMMENTS),)
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -46,9 +131,60 @@ class FollowAdmin(admin.ModelAdmin):
         'author',
         'user',
     )
+    list_select_related = ('author', 'user')
+    raw_id_fields = ('author', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    """Bulk jobs over every row matching a filter; saved jobs are final."""
+    list_display = (
+        'pk',
+        'action',
+        'status',
+        'progress',
+        'created_by',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'action')
+    list_select_related = ('created_by',)
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group', 'target_group')
+    fields = (
+        'action',
+        'author',
+        'group',
+        'date_from',
+        'date_to',
+        'target_group',
+    )
+    status_fields = (
+        'status', 'progress', 'error', 'created_by', 'updated', 'finished',
+    )
+
+    def progress(self, obj) -> str:
+        return f'{obj.processed} / {obj.total}'
+
+    def get_fields(self, request, obj=None):
+        if obj is None:
+            return self.fields
+        return self.fields + self.status_fields
+
+    def get_readonly_fields(self, request, obj=None):
+        if obj is None:
+            return ()
+        return self.fields + self.status_fields
+
+    def save_model(self, request, obj, form, change) -> None:
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
 
 
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
 admin.site.register(Group, GroupAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,99 @@
+"""Denormalized counters.
+
+Post counts of authors and groups, comment counts of posts and follower
+counts of users are kept next to the rows they describe, so pages read
+them instead of running ``COUNT(*)``. The counters are adjusted with
+``F()`` expressions from model signals and can be recomputed in bulk
+with the ``reconcile_counters`` management command.
+"""
+from typing import Dict
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, Follow, Group, Post, User, UserCounters
+
+
+def add(queryset, field: str, delta: int) -> int:
+    """Atomically add ``delta`` to ``field`` of every row in ``queryset``."""
+    value = F(field) + delta
+    if delta < 0:
+        value = Greatest(value, 0)
+    return queryset.update(**{field: value})
+
+
+def add_to_user(user_id: int, field: str, delta: int) -> None:
+    """Adjust a user counter; missing rows are created on first read."""
+    add(UserCounters.objects.filter(user_id=user_id), field, delta)
+
+
+def for_user(user) -> UserCounters:
+    """Counters of ``user``, computed on the spot if they don't exist yet."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        counters, _ = UserCounters.objects.update_or_create(
+            user_id=user.pk,
+            defaults={
+                'posts_count': Post.objects.filter(author=user).count(),
+                'followers_count': Follow.objects.filter(
+                    author=user
+                ).count(),
+                'following_count': Follow.objects.filter(user=user).count(),
+            },
+        )
+        user.counters = counters
+        return counters
+
+
+def _count(queryset, field: str):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')}).order_by().values(
+            field
+        ).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def _reconcile(queryset, field: str, actual) -> int:
+    drifted = queryset.annotate(actual=actual).exclude(
+        **{field: F('actual')}
+    ).values('pk')
+    return queryset.filter(pk__in=drifted).update(**{field: actual})
+
+
+def reconcile() -> Dict[str, int]:
+    """Recompute every counter; return the number of fixed rows per counter.
+
+    Each counter is fixed with a single ``UPDATE`` touching only the rows
+    that drifted.
+    """
+    UserCounters.objects.bulk_create(
+        [
+            UserCounters(user_id=pk)
+            for pk in User.objects.filter(
+                counters__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    user_counters = UserCounters.objects.all()
+    return {
+        'group.posts_count': _reconcile(
+            Group.objects.all(), 'posts_count', _count(Post.objects, 'group')
+        ),
+        'post.comments_count': _reconcile(
+            Post.objects.all(),
+            'comments_count',
+            _count(Comment.objects, 'post'),
+        ),
+        'user.posts_count': _reconcile(
+            user_counters, 'posts_count', _count(Post.objects, 'author')
+        ),
+        'user.followers_count': _reconcile(
+            user_counters, 'followers_count', _count(Follow.objects, 'author')
+        ),
+        'user.following_count': _reconcile(
+            user_counters, 'following_count', _count(Follow.objects, 'user')
+        ),
+    }
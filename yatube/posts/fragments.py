@@ -0,0 +1,78 @@
+"""Cache scopes of the feed fragments.
+
+Each feed template caches its cards with ``{% versioned_cache %}`` under
+the versions of the scopes below; ``posts.signals`` bumps them whenever
+a post, comment, group, user or follow changes. With a shared cache the
+same versions give the pages and the API their ETags, so a revalidation
+costs at most one primary key lookup.
+"""
+from typing import Optional
+
+from core import cache
+
+from .models import Group, Post, User
+
+POSTS = 'posts'
+GROUPS = 'groups'
+
+
+def group(pk) -> str:
+    return f'group:{pk}'
+
+
+def profile(pk) -> str:
+    return f'profile:{pk}'
+
+
+def follow(pk) -> str:
+    return f'follow:{pk}'
+
+
+def invalidate_post(author_id: int, *group_ids) -> None:
+    """Invalidate the feeds showing a post of ``author_id``."""
+    cache.bump(
+        POSTS,
+        profile(author_id),
+        *(group(pk) for pk in set(group_ids) if pk is not None),
+    )
+
+
+def index_etag(request) -> Optional[str]:
+    return cache.etag(request, POSTS)
+
+
+def trending_etag(request, slug: Optional[str] = None) -> Optional[str]:
+    """Comments bump the versions of the feeds showing their post."""
+    if slug is None:
+        return cache.etag(request, POSTS)
+    return group_etag(request, slug)
+
+
+def group_etag(request, slug: str) -> Optional[str]:
+    pk = Group.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    return pk and cache.etag(request, group(pk))
+
+
+def profile_etag(request, username: str) -> Optional[str]:
+    """Also changes when the viewer follows or unfollows someone."""
+    pk = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    scopes = [profile(pk), GROUPS]
+    if request.user.is_authenticated:
+        scopes.append(follow(request.user.pk))
+    return pk and cache.etag(request, *scopes)
+
+
+def follow_etag(request) -> Optional[str]:
+    if not request.user.is_authenticated:
+        return None
+    return cache.etag(request, POSTS, follow(request.user.pk))
+
+
+def post_etag(request, post_id: int) -> Optional[str]:
+    """Covers edits, comments, the author and the group titles."""
+    author_id = Post.objects.filter(
+        pk=post_id
+    ).values_list('author_id', flat=True).first()
+    return author_id and cache.etag(request, profile(author_id), GROUPS)
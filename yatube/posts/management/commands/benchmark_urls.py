@@ -0,0 +1,134 @@
+import json
+import statistics
+import time
+from typing import Dict, Optional
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import urls
+from posts.models import Comment, Post, User
+
+# Views that change data on GET, or only answer POST.
+SKIPPED = {'add_comment', 'delete_comment', 'profile_follow',
+           'profile_unfollow'}
+
+
+def sample_kwargs(user: User) -> Dict[str, object]:
+    """URL arguments pointing at busy objects of the database."""
+    post = Post.objects.filter(author=user).order_by(
+        '-comments_count'
+    ).first() or Post.objects.order_by('-comments_count').first()
+    if post is None:
+        raise CommandError('No posts to benchmark; run generate_load_data.')
+    group = post.group or Post.objects.filter(
+        group__isnull=False
+    ).first().group
+    comment = Comment.objects.filter(post=post).first()
+    return {
+        'slug': group.slug,
+        'username': post.author.username,
+        'post_id': post.pk,
+        'comment_id': comment.pk if comment else 0,
+    }
+
+
+def measure(client: Client, path: str, requests: int) -> Dict[str, object]:
+    timings = []
+    queries = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, {'q': 'кот'} if 'search' in path else {})
+        timings.append((time.perf_counter() - start) * 1000)
+        queries.append(int(response.get('X-Query-Count', 0)))
+    percentiles = statistics.quantiles(timings, n=100)
+    return {
+        'path': path,
+        'status': response.status_code,
+        'p50_ms': round(percentiles[49], 2),
+        'p99_ms': round(percentiles[98], 2),
+        'queries': max(queries),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure p50/p99 latency and queries per request of every '
+        'posts URL, optionally saving and comparing the results.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument(
+            '--username',
+            help='User to log in as; defaults to the one following most.',
+        )
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Benchmark without logging in.',
+        )
+        parser.add_argument('--output', help='Save the results as JSON.')
+        parser.add_argument(
+            '--compare', help='JSON results of an earlier run to compare.'
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['username']:
+            user = User.objects.get(username=options['username'])
+        else:
+            user = User.objects.annotate(
+                following_total=Count('follower')
+            ).order_by('-following_total').first()
+        kwargs = sample_kwargs(user)
+        client = Client()
+        if not options['anonymous']:
+            client.force_login(user)
+        cache.clear()
+
+        results = {}
+        for pattern in urls.urlpatterns:
+            if pattern.name in SKIPPED:
+                continue
+            path = reverse(f'{urls.app_name}:{pattern.name}', kwargs={
+                name: kwargs[name] for name in pattern.pattern.converters
+            })
+            client.get(path)
+            results[pattern.name] = measure(
+                client, path, options['requests']
+            )
+
+        previous = self.load(options['compare'])
+        for name, result in results.items():
+            line = (
+                f"{name:<14} {result['status']} "
+                f"p50 {result['p50_ms']:>7.2f} ms  "
+                f"p99 {result['p99_ms']:>7.2f} ms  "
+                f"{result['queries']:>2} queries"
+            )
+            if name in previous:
+                before = previous[name]
+                line += (
+                    f"  (p50 {result['p50_ms'] - before['p50_ms']:+.2f} ms, "
+                    f"{result['queries'] - before['queries']:+d} queries)"
+                )
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                json.dump({
+                    'created': timezone.now().isoformat(),
+                    'requests': options['requests'],
+                    'anonymous': options['anonymous'],
+                    'urls': results,
+                }, file, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def load(path: Optional[str]) -> Dict[str, Dict]:
+        if not path:
+            return {}
+        with open(path) as file:
+            return json.load(file)['urls']
@@ -0,0 +1,242 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from PIL import Image
+
+from posts import counters, search, timeline, trending
+from posts.models import Comment, Follow, Group, Post, User
+
+# Generated images are kept apart from uploads, under MEDIA_ROOT.
+IMAGE_DIR = 'posts/load'
+
+WORDS = (
+    'кот котики собака утро вечер город море лес река дом работа книга '
+    'музыка фильм дорога поезд солнце дождь снег друг семья обед кофе чай '
+    'проект код сервер база данные запрос страница лента пост комментарий '
+    'подписка группа фото отпуск горы прогулка новости спорт игра'
+).split()
+
+
+@contextmanager
+def manual_dates(model, field_name: str) -> Iterator[None]:
+    """Let ``bulk_create`` store the given value of an auto_now_add field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def power_law_weights(count: int, exponent: float) -> List[float]:
+    """Zipf weights: the item of rank r is picked in proportion to r^-s."""
+    return [1 / rank ** exponent for rank in range(1, count + 1)]
+
+
+def text(min_words: int, max_words: int) -> str:
+    return ' '.join(
+        random.choices(WORDS, k=random.randint(min_words, max_words))
+    ).capitalize()
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate production-sized data: users, groups, posts with images, '
+        'comments and a power-law follow graph. Images are written to '
+        f'MEDIA_ROOT/{IMAGE_DIR}; --delete-images removes them.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Average number of authors followed by a user.',
+        )
+        parser.add_argument(
+            '--exponent', type=float, default=1.1,
+            help='Power-law exponent of author popularity.',
+        )
+        parser.add_argument(
+            '--image-ratio', type=float, default=0.2,
+            help='Share of posts with an image.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='Posts and comments are spread over this many days.',
+        )
+        parser.add_argument('--prefix', default='load')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--delete-images', action='store_true',
+            help=f'Delete the images in MEDIA_ROOT/{IMAGE_DIR} and exit.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        if options['delete_images']:
+            return self.delete_images()
+        random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        prefix = options['prefix']
+        now = timezone.now()
+        span = timedelta(days=options['days']).total_seconds()
+
+        password = make_password(None)
+        users = self.create(User, (
+            User(username=f'{prefix}{i}', password=password)
+            for i in range(options['users'])
+        ), User.objects.filter(username__startswith=prefix))
+        if not users:
+            raise CommandError(
+                f'Users named {prefix}* exist already; use another --prefix.'
+            )
+        groups = self.create(Group, (
+            Group(
+                title=f'Group {prefix}{i}',
+                slug=f'{prefix}-group-{i}',
+                description=text(5, 20),
+            )
+            for i in range(options['groups'])
+        ), Group.objects.filter(slug__startswith=f'{prefix}-group-'))
+        weights = power_law_weights(len(users), options['exponent'])
+        images = self.create_images(prefix)
+
+        def posts() -> Iterator[Post]:
+            authors = random.choices(users, weights, k=options['posts'])
+            for author_id in authors:
+                has_image = random.random() < options['image_ratio']
+                yield Post(
+                    author_id=author_id,
+                    group_id=random.choice(groups + [None]),
+                    text=text(5, 80),
+                    image=random.choice(images) if has_image else '',
+                    pub_date=now - timedelta(seconds=random.random() * span),
+                )
+
+        with manual_dates(Post, 'pub_date'):
+            first_post, last_post = self.create_range(Post, posts())
+
+        def comments() -> Iterator[Comment]:
+            for _ in range(options['comments']):
+                yield Comment(
+                    post_id=random.randint(first_post, last_post),
+                    author_id=random.choice(users),
+                    text=text(2, 30),
+                    created=now - timedelta(seconds=random.random() * span),
+                )
+
+        with manual_dates(Comment, 'created'):
+            self.insert(Comment, comments())
+
+        def follows() -> Iterator[Follow]:
+            mean = options['follows']
+            for user_id in users:
+                # Pareto(1.5) has a mean of 3, so this averages ``mean``.
+                count = min(
+                    int(random.paretovariate(1.5) * mean / 3), len(users) - 1
+                )
+                authors = set(random.choices(users, weights, k=count))
+                authors.discard(user_id)
+                for author_id in authors:
+                    yield Follow(user_id=user_id, author_id=author_id)
+
+        self.insert(Follow, follows())
+        self.finish(users)
+
+    def insert(self, model, objects: Iterable) -> None:
+        """Insert ``objects`` in batches.
+
+        Every batch is committed on its own, so a server running meanwhile
+        only waits for one batch to get the write lock.
+        """
+        objects = iter(objects)
+        total = 0
+        while True:
+            batch = list(islice(objects, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+        self.stdout.write(f'{model.__name__}: {total}')
+
+    def create(self, model, objects: Iterable, created) -> List[int]:
+        """Insert ``objects``; return the pks of the new rows of ``created``.
+
+        ``bulk_create`` doesn't return primary keys on SQLite, so they are
+        read back with the ``created`` queryset, limited to rows above the
+        largest primary key from before the insert.
+        """
+        start = model.objects.aggregate(start=Max('pk'))['start'] or 0
+        self.insert(model, objects)
+        return list(created.filter(pk__gt=start).values_list('pk', flat=True))
+
+    def create_range(self, model, objects: Iterable) -> Tuple[int, int]:
+        """Insert ``objects``; return the first and last new primary key.
+
+        Rows other processes insert meanwhile may fall in the range too.
+        """
+        start = model.objects.aggregate(start=Max('pk'))['start'] or 0
+        self.insert(model, objects)
+        new = model.objects.filter(pk__gt=start).aggregate(
+            first=Min('pk'), last=Max('pk')
+        )
+        return new['first'], new['last']
+
+    def create_images(self, prefix: str) -> List[str]:
+        names = []
+        for i in range(5):
+            image = Image.new('RGB', (1280, 720), tuple(
+                random.randrange(256) for _ in range(3)
+            ))
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            names.append(default_storage.save(
+                f'{IMAGE_DIR}/{prefix}-{i}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return names
+
+    def delete_images(self) -> None:
+        files = []
+        if default_storage.exists(IMAGE_DIR):
+            _, files = default_storage.listdir(IMAGE_DIR)
+        for name in files:
+            default_storage.delete(f'{IMAGE_DIR}/{name}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {len(files)} images.'
+        ))
+
+    def finish(self, users: List[int]) -> None:
+        """Redo what the model signals do for single saves."""
+        for counter, fixed in counters.reconcile().items():
+            self.stdout.write(f'{counter}: {fixed} rows fixed')
+        followers = User.objects.filter(
+            pk__in=users, follower__isnull=False
+        ).distinct()
+        for user in followers.iterator():
+            with transaction.atomic():
+                timeline.rebuild(user)
+        self.stdout.write(f'Scored {trending.rebuild()} trending posts.')
+        posts, comments = search.rebuild()
+        self.stdout.write(f'Indexed {posts} posts and {comments} comments.')
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS(
+            'Load data generated. Run pregenerate_thumbnails to create '
+            'the image variants.'
+        ))
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts import thumbnails
+from posts.models import Post
+
+
+def generate_in_thread(post_id: int) -> bool:
+    try:
+        return thumbnails.generate(post_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Create the missing size variants of existing post images.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of images processed in parallel.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        post_ids = Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('pk', flat=True).iterator()
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+                created = sum(pool.map(generate_in_thread, post_ids))
+        else:
+            created = sum(map(thumbnails.generate, post_ids))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created image variants for {created} posts.'
+        ))
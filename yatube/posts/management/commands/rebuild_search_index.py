@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Reindex every post and comment for full-text search.'
+
+    def handle(self, *args, **options) -> None:
+        posts, comments = search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {posts} posts and {comments} comments.'
+        ))
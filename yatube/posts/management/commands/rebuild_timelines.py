@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild materialized follow timelines from the follow graph.'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            'usernames',
+            nargs='*',
+            help='Only rebuild the timelines of these users.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        users = User.objects.filter(follower__isnull=False).distinct()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+        rebuilt = 0
+        for user in users.iterator():
+            timeline.rebuild(user)
+            rebuilt += 1
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {rebuilt} timelines.'))
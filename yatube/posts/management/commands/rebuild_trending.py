@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Recompute trending scores and top lists from the comments.'
+
+    def handle(self, *args, **options) -> None:
+        scored = trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {scored} trending posts.'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts import counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized post, comment and follower counters.'
+
+    def handle(self, *args, **options) -> None:
+        for counter, fixed in counters.reconcile().items():
+            self.stdout.write(f'{counter}: {fixed} rows fixed')
+        self.stdout.write(self.style.SUCCESS('Counters reconciled.'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import moderation
+from posts.models import ModerationJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending moderation jobs and resume interrupted ones.'
+
+    def handle(self, *args, **options) -> None:
+        jobs = ModerationJob.objects.filter(status__in=(
+            ModerationJob.PENDING, ModerationJob.RUNNING
+        )).order_by('created')
+        finished = 0
+        for job in jobs:
+            if not moderation.run(job):
+                self.stdout.write(f'{job}: running elsewhere, skipped.')
+                continue
+            finished += 1
+            self.stdout.write(
+                f'{job}: {job.processed} of {job.total} rows.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Finished {finished} moderation jobs.'
+        ))
@@ -0,0 +1,84 @@
+from itertools import islice
+
+from django.db import migrations
+
+from core.stemmer import stems
+
+TABLES = {
+    'posts_post_search': "body, tokenize='unicode61 remove_diacritics 2'",
+    'posts_comment_search': (
+        "body, post_id UNINDEXED, tokenize='unicode61 remove_diacritics 2'"
+    ),
+}
+
+
+BATCH_SIZE = 500
+
+
+def insert(cursor, sql, rows):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, BATCH_SIZE))
+        if not batch:
+            return
+        cursor.executemany(sql, batch)
+
+
+def has_fts5(connection) -> bool:
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_tables(apps, schema_editor):
+    if not has_fts5(schema_editor.connection):
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in TABLES.items():
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {table} USING fts5({columns})'
+            )
+        insert(
+            cursor,
+            'INSERT INTO posts_post_search (rowid, body) VALUES (%s, %s)',
+            (
+                (pk, ' '.join(stems(text)))
+                for pk, text in Post.objects.values_list(
+                    'pk', 'text'
+                ).iterator()
+            ),
+        )
+        insert(
+            cursor,
+            'INSERT INTO posts_comment_search (rowid, body, post_id) '
+            'VALUES (%s, %s, %s)',
+            (
+                (pk, ' '.join(stems(text)), post_id)
+                for pk, text, post_id in Comment.objects.values_list(
+                    'pk', 'text', 'post_id'
+                ).iterator()
+            ),
+        )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLES:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=100, verbose_name='Source image')),
+                ('width', models.PositiveSmallIntegerField(verbose_name='Width')),
+                ('height', models.PositiveSmallIntegerField(verbose_name='Height')),
+                ('format', models.CharField(choices=[('webp', 'WebP'), ('jpeg', 'JPEG')], max_length=4, verbose_name='Format')),
+                ('file', models.ImageField(upload_to='posts/variants/', verbose_name='File')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_variants', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Image variant',
+                'verbose_name_plural': 'Image variants',
+                'ordering': ('width',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagevariant',
+            constraint=models.UniqueConstraint(fields=('post', 'width', 'format'), name='unique_image_variant'),
+        ),
+    ]
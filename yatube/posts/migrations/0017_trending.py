@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:09
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(editable=False, null=True, verbose_name='Trending score'),
+        ),
+        migrations.CreateModel(
+            name='TrendingEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('group', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_entries', to='posts.Post')),
+            ],
+            options={
+                'verbose_name': 'Trending entry',
+                'verbose_name_plural': 'Trending entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='trendingentry',
+            index=models.Index(fields=['group', '-score', '-post'], name='trending_group_score_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingentry',
+            constraint=models.UniqueConstraint(fields=('group', 'post'), name='unique_trending_entry'),
+        ),
+        migrations.AddConstraint(
+            model_name='trendingentry',
+            constraint=models.UniqueConstraint(condition=models.Q(group__isnull=True), fields=('post',), name='unique_global_trending_entry'),
+        ),
+    ]
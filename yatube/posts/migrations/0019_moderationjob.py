@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-18 04:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_comment_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('delete_posts', 'Delete posts'), ('delete_comments', 'Delete comments'), ('move_posts', 'Move posts to another group')], max_length=20, verbose_name='Action')),
+                ('date_from', models.DateTimeField(blank=True, help_text='Only rows published at or after this moment', null=True, verbose_name='From')),
+                ('date_to', models.DateTimeField(blank=True, help_text='Only rows published before this moment', null=True, verbose_name='To')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', editable=False, max_length=10, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, editable=False, verbose_name='Total')),
+                ('processed', models.PositiveIntegerField(default=0, editable=False, verbose_name='Processed')),
+                ('position', models.PositiveIntegerField(default=0, editable=False)),
+                ('error', models.TextField(blank=True, editable=False, verbose_name='Error')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Created')),
+                ('finished', models.DateTimeField(editable=False, null=True, verbose_name='Finished')),
+                ('author', models.ForeignKey(blank=True, help_text='Only posts or comments of this author', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('created_by', models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, help_text='Only posts of this group, or comments on them', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group')),
+                ('target_group', models.ForeignKey(blank=True, help_text='Group the posts are moved to; empty removes the group', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group')),
+            ],
+            options={
+                'verbose_name': 'Moderation job',
+                'verbose_name_plural': 'Moderation jobs',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
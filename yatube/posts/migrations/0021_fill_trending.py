@@ -0,0 +1,23 @@
+from django.db import migrations
+
+from posts import scoring
+
+
+def fill_trending(apps, schema_editor):
+    scoring.rebuild(
+        apps.get_model('posts', 'Comment'),
+        apps.get_model('posts', 'Group'),
+        apps.get_model('posts', 'Post'),
+        apps.get_model('posts', 'TrendingEntry'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_verbose_names'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_trending, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,17 @@
 from core.models import CreatedModel
 
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models.functions import Substr
 from django.contrib.auth import get_user_model
 
 
 User = get_user_model()
 
+# Characters of Post.text loaded for feed cards; enough for
+# ``truncatewords:30`` in includes/post_feed_card.html.
+FEED_PREVIEW_LENGTH = 1000
+
 
 class Group(models.Model):
     """Model - group."""
@@ -16,6 +22,11 @@ class Group(models.Model):
     )
     slug = models.SlugField(allow_unicode=True, unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Posts',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         verbose_name = 'Group'
@@ -28,6 +39,22 @@ class Group(models.Model):
         return f'<Group {self.title}>'
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self) -> 'PostQuerySet':
+        """Posts with everything a feed card renders, in two queries.
+
+        Author and group are joined, the full text is deferred in favour
+        of a ``text_preview`` prefix, the comment count comes from the
+        denormalized ``comments_count`` column and the image variants of
+        the whole page are prefetched at once.
+        """
+        return self.select_related('author', 'group').defer(
+            'text'
+        ).annotate(
+            text_preview=Substr('text', 1, FEED_PREVIEW_LENGTH)
+        ).prefetch_related('image_variants')
+
+
 class Post(CreatedModel):
     """Model - post."""
     text = models.TextField(
@@ -54,9 +81,35 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True,
     )
+    comments_count = models.PositiveIntegerField(
+        'Comments',
+        default=0,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        'Trending score',
+        null=True,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_date_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_date_idx',
+            ),
+        ]
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
 
@@ -64,6 +117,37 @@ class Post(CreatedModel):
         return self.text[:15]
 
 
+class ImageVariant(models.Model):
+    """Model - resized copy of a post image in one width and format."""
+    WEBP = 'webp'
+    JPEG = 'jpeg'
+    FORMATS = (
+        (WEBP, 'WebP'),
+        (JPEG, 'JPEG'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='image_variants',
+    )
+    source = models.CharField('Source image', max_length=100)
+    width = models.PositiveSmallIntegerField('Width')
+    height = models.PositiveSmallIntegerField('Height')
+    format = models.CharField('Format', max_length=4, choices=FORMATS)
+    file = models.ImageField('File', upload_to='posts/variants/')
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['post', 'width', 'format'], name='unique_image_variant')
+        ]
+        verbose_name = 'Image variant'
+        verbose_name_plural = 'Image variants'
+
+    def __str__(self) -> str:
+        return f'{self.post_id} {self.width}w {self.format}'
+
+
 class Comment(models.Model):
     """Model - comment."""
     post = models.ForeignKey(
@@ -89,6 +173,16 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx',
+            ),
+            models.Index(
+                fields=['-created', '-id'],
+                name='comment_created_idx',
+            ),
+        ]
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
 
@@ -118,3 +212,207 @@ class Follow(models.Model):
 
     def __str__(self) -> str:
         return f'{self.user} follows {self.author}'
+
+
+class UserCounters(models.Model):
+    """Model - denormalized per-user counters."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+    )
+    posts_count = models.PositiveIntegerField('Posts', default=0)
+    followers_count = models.PositiveIntegerField('Followers', default=0)
+    following_count = models.PositiveIntegerField('Following', default=0)
+
+    class Meta:
+        verbose_name = 'User counters'
+        verbose_name_plural = 'User counters'
+
+    def __str__(self) -> str:
+        return f'Counters of {self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    """Model - materialized follow timeline entry."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'post'], name='unique_timeline_entry')
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'author'],
+                name='timeline_user_author_idx',
+            ),
+        ]
+        verbose_name = 'Timeline entry'
+        verbose_name_plural = 'Timeline entries'
+
+    def __str__(self) -> str:
+        return f'{self.post_id} in timeline of {self.user_id}'
+
+
+class TrendingEntry(models.Model):
+    """Model - post in the top of the global or a group trending feed."""
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        null=True,
+        related_name='+',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending_entries',
+    )
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'post'], name='unique_trending_entry'
+            ),
+            models.UniqueConstraint(
+                fields=['post'],
+                condition=models.Q(group__isnull=True),
+                name='unique_global_trending_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['group', '-score', '-post'],
+                name='trending_group_score_idx',
+            ),
+        ]
+        verbose_name = 'Trending entry'
+        verbose_name_plural = 'Trending entries'
+
+    def __str__(self) -> str:
+        return f'{self.post_id} trending in {self.group_id or "all"}'
+
+
+class ModerationJob(models.Model):
+    """Model - bulk moderation over every post or comment matching a filter.
+
+    ``posts.moderation`` runs the job in batches; ``position`` is the last
+    processed primary key, so an interrupted job resumes where it stopped.
+    """
+    DELETE_POSTS = 'delete_posts'
+    DELETE_COMMENTS = 'delete_comments'
+    MOVE_POSTS = 'move_posts'
+    ACTIONS = (
+        (DELETE_POSTS, 'Delete posts'),
+        (DELETE_COMMENTS, 'Delete comments'),
+        (MOVE_POSTS, 'Move posts to another group'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    action = models.CharField('Action', max_length=20, choices=ACTIONS)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Only posts or comments of this author',
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Only posts of this group, or comments on them',
+    )
+    date_from = models.DateTimeField(
+        'From',
+        null=True,
+        blank=True,
+        help_text='Only rows published at or after this moment',
+    )
+    date_to = models.DateTimeField(
+        'To',
+        null=True,
+        blank=True,
+        help_text='Only rows published before this moment',
+    )
+    target_group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text='Group the posts are moved to; empty removes the group',
+    )
+    status = models.CharField(
+        'Status',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        editable=False,
+    )
+    total = models.PositiveIntegerField('Total', default=0, editable=False)
+    processed = models.PositiveIntegerField(
+        'Processed', default=0, editable=False
+    )
+    position = models.PositiveIntegerField(default=0, editable=False)
+    error = models.TextField('Error', blank=True, editable=False)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='+',
+    )
+    created = models.DateTimeField('Created', auto_now_add=True)
+    # Saved with every batch, so a job nobody works on can be told apart.
+    updated = models.DateTimeField('Updated', auto_now=True)
+    finished = models.DateTimeField('Finished', null=True, editable=False)
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'Moderation job'
+        verbose_name_plural = 'Moderation jobs'
+
+    def __str__(self) -> str:
+        return f'{self.get_action_display()} #{self.pk}'
+
+    def clean(self) -> None:
+        if not any((self.author_id, self.group_id, self.date_from,
+                    self.date_to)):
+            raise ValidationError('Choose at least one filter.')
+        if self.action == self.MOVE_POSTS and (
+            self.group_id is not None and self.group_id == self.target_group_id
+        ):
+            raise ValidationError('The posts are already in this group.')
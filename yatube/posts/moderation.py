@@ -0,0 +1,233 @@
+"""Bulk moderation jobs.
+
+A ``ModerationJob`` deletes or moves every post or comment matching its
+filter. A saved job is queued on a single background thread once its
+transaction commits and runs in batches of
+``settings.MODERATION_BATCH_SIZE`` rows, one short transaction each, with
+a pause of ``settings.MODERATION_PAUSE`` seconds in between so requests
+get the SQLite write lock. The job row records the progress after every
+batch; ``run_moderation_jobs`` resumes jobs a restart interrupted. A
+process claims a job with a conditional ``UPDATE`` before running it, so
+a job is never run twice at the same time: only pending jobs, and running
+jobs not saved for ``settings.MODERATION_STALE_AFTER`` seconds, can be
+claimed.
+
+Rows are deleted with one statement per table instead of Django's
+per-row cascade, so the data the signals would maintain for each row
+(counters, search index, timelines, trending lists, cached feeds and
+image variant files) is brought up to date once per batch.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import counters, fragments, search, trending
+from .models import (
+    Comment, Group, ImageVariant, ModerationJob, Post, TimelineEntry,
+    TrendingEntry,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows referencing a post, deleted along with it.
+POST_DEPENDENTS = (Comment, ImageVariant, TimelineEntry, TrendingEntry)
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix='moderation'
+            )
+        return _executor
+
+
+def targets(job: ModerationJob):
+    """Posts or comments the job applies to."""
+    if job.action == ModerationJob.DELETE_COMMENTS:
+        queryset, group, date = Comment.objects.all(), 'post__group', 'created'
+    else:
+        queryset, group, date = Post.objects.all(), 'group', 'pub_date'
+    filters = {}
+    if job.author_id is not None:
+        filters['author'] = job.author_id
+    if job.group_id is not None:
+        filters[group] = job.group_id
+    if job.date_from is not None:
+        filters[f'{date}__gte'] = job.date_from
+    if job.date_to is not None:
+        filters[f'{date}__lt'] = job.date_to
+    queryset = queryset.filter(**filters)
+    if job.action == ModerationJob.MOVE_POSTS:
+        queryset = queryset.exclude(group=job.target_group_id)
+    return queryset
+
+
+def _raw_delete(queryset) -> int:
+    """Delete the rows with one statement, without signals or cascades."""
+    return queryset._raw_delete(queryset.db)
+
+
+def delete_posts(posts) -> List[int]:
+    """Delete ``posts`` and everything referencing them."""
+    rows = list(posts.values_list('pk', 'author_id', 'group_id'))
+    pks = [pk for pk, _, _ in rows]
+    comment_ids = list(Comment.objects.filter(
+        post_id__in=pks
+    ).values_list('pk', flat=True))
+    files = list(ImageVariant.objects.filter(
+        post_id__in=pks
+    ).values_list('file', flat=True))
+    for model in POST_DEPENDENTS:
+        _raw_delete(model.objects.filter(post_id__in=pks))
+    _raw_delete(Post.objects.filter(pk__in=pks))
+
+    search.unindex_posts(pks)
+    search.unindex_comments(comment_ids)
+    for author_id, count in Counter(a for _, a, _ in rows).items():
+        counters.add_to_user(author_id, 'posts_count', -count)
+    for group_id, count in Counter(g for _, _, g in rows).items():
+        if group_id is not None:
+            counters.add(
+                Group.objects.filter(pk=group_id), 'posts_count', -count
+            )
+    for _, author_id, group_id in set(rows):
+        fragments.invalidate_post(author_id, group_id)
+    transaction.on_commit(lambda: _delete_files(files))
+    return pks
+
+
+def delete_comments(comments) -> List[int]:
+    """Delete ``comments``."""
+    rows = list(comments.values_list(
+        'pk', 'post_id', 'post__author_id', 'post__group_id'
+    ))
+    pks = [pk for pk, _, _, _ in rows]
+    _raw_delete(Comment.objects.filter(pk__in=pks))
+
+    search.unindex_comments(pks)
+    for post_id, count in Counter(p for _, p, _, _ in rows).items():
+        counters.add(
+            Post.objects.filter(pk=post_id), 'comments_count', -count
+        )
+    for _, _, author_id, group_id in set(rows):
+        fragments.invalidate_post(author_id, group_id)
+    return pks
+
+
+def move_posts(posts, group_id: Optional[int]) -> List[int]:
+    """Move ``posts`` to the group ``group_id``, or out of any group."""
+    rows = list(posts.values_list('pk', 'author_id', 'group_id'))
+    pks = [pk for pk, _, _ in rows]
+    Post.objects.filter(pk__in=pks).update(group_id=group_id)
+
+    trending.move_many(pks, group_id)
+    for old_group_id, count in Counter(g for _, _, g in rows).items():
+        if old_group_id is not None:
+            counters.add(
+                Group.objects.filter(pk=old_group_id), 'posts_count', -count
+            )
+    if group_id is not None:
+        counters.add(
+            Group.objects.filter(pk=group_id), 'posts_count', len(rows)
+        )
+    for author_id, old_group_id in {(a, g) for _, a, g in rows}:
+        fragments.invalidate_post(author_id, old_group_id, group_id)
+    return pks
+
+
+def _delete_files(names: List[str]) -> None:
+    storage = ImageVariant._meta.get_field('file').storage
+    for name in names:
+        storage.delete(name)
+
+
+def _apply(job: ModerationJob, batch) -> List[int]:
+    if job.action == ModerationJob.DELETE_POSTS:
+        return delete_posts(batch)
+    if job.action == ModerationJob.DELETE_COMMENTS:
+        return delete_comments(batch)
+    return move_posts(batch, job.target_group_id)
+
+
+def claim(job: ModerationJob) -> bool:
+    """Mark the job as running by this process, if no other one runs it."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.MODERATION_STALE_AFTER)
+    claimed = ModerationJob.objects.filter(
+        Q(status=ModerationJob.PENDING)
+        | Q(status=ModerationJob.RUNNING, updated__lt=stale),
+        pk=job.pk,
+    ).update(status=ModerationJob.RUNNING, updated=now)
+    if claimed:
+        job.refresh_from_db()
+    return bool(claimed)
+
+
+def run(job: ModerationJob) -> bool:
+    """Run the job to completion, continuing from its saved position.
+
+    Returns ``False`` without doing anything if the job is finished or
+    another process runs it.
+    """
+    if not claim(job):
+        return False
+    queryset = targets(job).order_by('pk')
+    job.total = job.processed + queryset.filter(
+        pk__gt=job.position
+    ).count()
+    job.save(update_fields=['total', 'updated'])
+    try:
+        while True:
+            pks = list(queryset.filter(pk__gt=job.position).values_list(
+                'pk', flat=True
+            )[:settings.MODERATION_BATCH_SIZE])
+            if not pks:
+                break
+            with transaction.atomic():
+                done = _apply(job, queryset.filter(pk__in=pks))
+                job.position = pks[-1]
+                job.processed += len(done)
+                job.save(
+                    update_fields=['position', 'processed', 'updated']
+                )
+            time.sleep(settings.MODERATION_PAUSE)
+    except Exception as error:
+        job.status = ModerationJob.FAILED
+        job.error = repr(error)
+        job.save(update_fields=['status', 'error', 'updated'])
+        raise
+    job.status = ModerationJob.DONE
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'finished', 'updated'])
+    return True
+
+
+def _run(job_id: int) -> None:
+    try:
+        job = ModerationJob.objects.filter(pk=job_id).first()
+        if job is not None:
+            run(job)
+    except Exception:
+        logger.exception('Moderation job %s failed', job_id)
+    finally:
+        connections.close_all()
+
+
+def schedule(job: ModerationJob) -> None:
+    """Queue the job once the transaction commits."""
+    job_id = job.pk
+    transaction.on_commit(lambda: executor().submit(_run, job_id))
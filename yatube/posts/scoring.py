@@ -0,0 +1,65 @@
+"""Trending score arithmetic and the full recomputation.
+
+Nothing here imports the models: ``rebuild`` takes the model classes, so
+``posts.trending`` passes the real ones and migrations pass the
+historical ones, and both compute the same scores and top lists.
+"""
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+
+BATCH_SIZE = 500
+
+
+def weight(moment: datetime) -> float:
+    """Logarithm of the weight of a comment made at ``moment``."""
+    return math.log(2) / settings.TRENDING_HALF_LIFE * moment.timestamp()
+
+
+def log_add(score: Optional[float], value: float) -> float:
+    """``log(exp(score) + exp(value))`` without overflowing."""
+    if score is None:
+        return value
+    high, low = max(score, value), min(score, value)
+    return high + math.log1p(math.exp(low - high))
+
+
+def scores(comments: Iterable[Tuple[int, datetime]]) -> Dict[int, float]:
+    """Scores of the posts of ``(post id, created)`` comment pairs."""
+    totals: Dict[int, Optional[float]] = defaultdict(lambda: None)
+    for post_id, created in comments:
+        totals[post_id] = log_add(totals[post_id], weight(created))
+    return dict(totals)
+
+
+def rebuild(Comment, Group, Post, TrendingEntry) -> int:
+    """Recompute every score and top list; return the scored posts."""
+    scored_posts = scores(Comment.objects.order_by().values_list(
+        'post_id', 'created'
+    ).iterator())
+
+    Post.objects.exclude(pk__in=scored_posts).update(trending_score=None)
+    Post.objects.bulk_update(
+        [
+            Post(pk=pk, trending_score=score)
+            for pk, score in scored_posts.items()
+        ],
+        ['trending_score'],
+        batch_size=BATCH_SIZE,
+    )
+
+    TrendingEntry.objects.all().delete()
+    scored = Post.objects.filter(trending_score__isnull=False)
+    scopes = [None] + list(Group.objects.values_list('pk', flat=True))
+    for group_id in scopes:
+        top = scored if group_id is None else scored.filter(group_id=group_id)
+        TrendingEntry.objects.bulk_create(
+            TrendingEntry(group_id=group_id, post_id=pk, score=score)
+            for pk, score in top.order_by(
+                '-trending_score', '-pk'
+            ).values_list('pk', 'trending_score')[:settings.TRENDING_SIZE]
+        )
+    return len(scored_posts)
@@ -0,0 +1,230 @@
+"""Full-text search over posts and comments.
+
+Texts are stemmed with ``core.stemmer`` and stored in two SQLite FTS5
+tables whose rowids are the post and comment ids; signals keep them in
+sync and ``rebuild_search_index`` refills them. Posts are ranked with
+bm25, a match in a comment counts for ``COMMENT_WEIGHT`` of a match in
+the post itself, and results are paged with a keyset on (rank, post id).
+
+On databases without the FTS5 tables the index is not maintained, and
+searches fall back to posts whose text contains every word of the query
+(``icontains``), newest first and without looking at comments.
+"""
+from itertools import islice
+from typing import Any, Iterable, List, Optional, Set, Tuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from core.paginator import CursorPaginator
+from core.stemmer import stems
+
+from .models import Comment, Post
+
+POST_TABLE = 'posts_post_search'
+COMMENT_TABLE = 'posts_comment_search'
+POST_COLUMNS = ('rowid', 'body')
+COMMENT_COLUMNS = ('rowid', 'body', 'post_id')
+COMMENT_WEIGHT = 0.5
+BATCH_SIZE = 500
+
+SEARCH_SQL = f'''
+    SELECT post_id, MAX(rank) AS score FROM (
+        SELECT rowid AS post_id, -bm25({POST_TABLE}) AS rank
+        FROM {POST_TABLE} WHERE {POST_TABLE} MATCH %s
+        UNION ALL
+        SELECT post_id, -bm25({COMMENT_TABLE}) * {COMMENT_WEIGHT}
+        FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s
+    )
+    GROUP BY post_id
+    {{having}}
+    ORDER BY score {{order}}, post_id {{order}}
+    LIMIT %s
+'''
+
+# Names of the databases known to have the search tables.
+_available: Set[str] = set()
+
+
+def available(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Whether the database of ``using`` has FTS5 and the search tables.
+
+    Only databases that have them are remembered, so tables created by a
+    later migration are picked up.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT sqlite_compileoption_used('ENABLE_FTS5'), COUNT(*) "
+                "FROM sqlite_master WHERE type = 'table' AND name IN (%s, %s)",
+                [POST_TABLE, COMMENT_TABLE],
+            )
+            fts5, tables = cursor.fetchone()
+        if not fts5 or tables < 2:
+            return False
+        _available.add(name)
+    return True
+
+
+def match_expression(query: str) -> str:
+    """FTS5 query matching documents that contain every word of ``query``."""
+    return ' '.join(f'"{word}"' for word in stems(query))
+
+
+def index_post(post: Post) -> None:
+    _write(POST_TABLE, POST_COLUMNS, [(post.pk, ' '.join(stems(post.text)))])
+
+
+def index_comment(comment: Comment) -> None:
+    _write(COMMENT_TABLE, COMMENT_COLUMNS, [
+        (comment.pk, ' '.join(stems(comment.text)), comment.post_id)
+    ])
+
+
+def unindex_post(post_id: int) -> None:
+    _delete(POST_TABLE, [post_id])
+
+
+def unindex_comment(comment_id: int) -> None:
+    _delete(COMMENT_TABLE, [comment_id])
+
+
+def unindex_posts(post_ids: List[int]) -> None:
+    _delete(POST_TABLE, post_ids)
+
+
+def unindex_comments(comment_ids: List[int]) -> None:
+    _delete(COMMENT_TABLE, comment_ids)
+
+
+def _write(table: str, columns: Tuple[str, ...], rows: Iterable[Tuple],
+           using: str = DEFAULT_DB_ALIAS) -> int:
+    if not available(using):
+        return 0
+    sql = 'INSERT OR REPLACE INTO {} ({}) VALUES ({})'.format(
+        table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    rows = iter(rows)
+    written = 0
+    with connections[using].cursor() as cursor:
+        while True:
+            batch = list(islice(rows, BATCH_SIZE))
+            if not batch:
+                return written
+            cursor.executemany(sql, batch)
+            written += len(batch)
+
+
+def _delete(table: str, rowids: List[int],
+            using: str = DEFAULT_DB_ALIAS) -> None:
+    if not available(using):
+        return
+    rowids = iter(rowids)
+    with connections[using].cursor() as cursor:
+        while True:
+            batch = list(islice(rowids, BATCH_SIZE))
+            if not batch:
+                return
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {table} WHERE rowid IN ({placeholders})', batch
+            )
+
+
+def rebuild(using: str = DEFAULT_DB_ALIAS) -> Tuple[int, int]:
+    """Reindex every post and comment; return how many were indexed."""
+    if not available(using):
+        return 0, 0
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {POST_TABLE}')
+        cursor.execute(f'DELETE FROM {COMMENT_TABLE}')
+    posts = Post.objects.using(using).values_list('pk', 'text')
+    comments = Comment.objects.using(using).values_list(
+        'pk', 'text', 'post_id'
+    )
+    return (
+        _write(POST_TABLE, POST_COLUMNS, (
+            (pk, ' '.join(stems(text)))
+            for pk, text in posts.iterator()
+        ), using),
+        _write(COMMENT_TABLE, COMMENT_COLUMNS, (
+            (pk, ' '.join(stems(text)), post_id)
+            for pk, text, post_id in comments.iterator()
+        ), using),
+    )
+
+
+def filter_matching(queryset, query: str):
+    """Narrow a post or comment queryset to the rows matching ``query``."""
+    table = COMMENT_TABLE if queryset.model is Comment else POST_TABLE
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not available(queryset.db):
+        for word in query.split():
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {table} WHERE {table} MATCH %s', [expression]
+    ))
+
+
+class SearchPaginator(CursorPaginator):
+    """Cursor paginator over the posts matching ``query``, best first.
+
+    ``object_list`` is only used to load the posts of the page; each post
+    gets its score as ``search_rank``.
+    """
+
+    def __init__(self, object_list, per_page, query: str) -> None:
+        super().__init__(object_list, per_page, key='search_rank')
+        self.query = query
+        self.expression = match_expression(query)
+
+    def to_python(self, value: Any) -> float:
+        return float(value)
+
+    def fetch(self, position: Optional[Tuple[Any, int]],
+              reverse: bool = False) -> List[Post]:
+        if not self.expression:
+            return []
+        if not available(self.object_list.db):
+            return self.fetch_unindexed(position, reverse)
+        params = [self.expression, self.expression]
+        op = '>' if reverse else '<'
+        having = ''
+        if position is not None:
+            rank, pk = position
+            having = (
+                f'HAVING score {op} %s '
+                f'OR (score = %s AND post_id {op} %s)'
+            )
+            params += [rank, rank, pk]
+        sql = SEARCH_SQL.format(
+            having=having, order='ASC' if reverse else 'DESC'
+        )
+        with connections[self.object_list.db].cursor() as cursor:
+            cursor.execute(sql, params + [self.per_page + 1])
+            ranks = cursor.fetchall()
+        posts = self.object_list.in_bulk([pk for pk, _ in ranks])
+        found = []
+        for pk, rank in ranks:
+            if pk in posts:
+                posts[pk].search_rank = rank
+                found.append(posts[pk])
+        return found
+
+    def fetch_unindexed(self, position: Optional[Tuple[Any, int]],
+                        reverse: bool = False) -> List[Post]:
+        """Substring matches, newest first, all ranked the same."""
+        queryset = filter_matching(self.object_list, self.query).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+        return list(
+            self.keyset(queryset, position, reverse)[:self.per_page + 1]
+        )
@@ -0,0 +1,268 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import cache
+
+from . import (
+    counters, fragments, moderation, search, thumbnails, timeline, trending,
+)
+from .models import (
+    Comment, Follow, Group, ImageVariant, ModerationJob, Post, User,
+    UserCounters,
+)
+
+# User fields rendered on the feed cards.
+CARD_FIELDS = ('username', 'first_name', 'last_name')
+
+
+@receiver(post_save, sender=User)
+def create_user_counters(sender, instance: User, created: bool, raw: bool,
+                         **kwargs) -> None:
+    """Start the counters of a new user at zero."""
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_stored(sender, instance: Post, raw: bool, **kwargs) -> None:
+    """Keep the stored group and image so an edit can tell what changed."""
+    instance._stored_group_id = None
+    instance._stored_image = None
+    if instance.pk and not raw:
+        instance._stored_group_id, instance._stored_image = (
+            Post.objects.filter(pk=instance.pk).values_list(
+                'group_id', 'image'
+            ).first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance: Post, created: bool, raw: bool,
+               **kwargs) -> None:
+    """Count a new post for its author and group."""
+    if raw:
+        return
+    if created:
+        counters.add_to_user(instance.author_id, 'posts_count', 1)
+    elif instance._stored_group_id == instance.group_id:
+        return
+    elif instance._stored_group_id is not None:
+        counters.add(
+            Group.objects.filter(pk=instance._stored_group_id),
+            'posts_count',
+            -1,
+        )
+    if instance.group_id is not None:
+        counters.add(
+            Group.objects.filter(pk=instance.group_id), 'posts_count', 1
+        )
+
+
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance: Post, **kwargs) -> None:
+    """Uncount a deleted post."""
+    counters.add_to_user(instance.author_id, 'posts_count', -1)
+    if instance.group_id is not None:
+        counters.add(
+            Group.objects.filter(pk=instance.group_id), 'posts_count', -1
+        )
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance: Comment, created: bool, raw: bool,
+                  **kwargs) -> None:
+    """Count a new comment for its post."""
+    if created and not raw:
+        counters.add(
+            Post.objects.filter(pk=instance.post_id), 'comments_count', 1
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance: Comment, **kwargs) -> None:
+    """Uncount a deleted comment."""
+    counters.add(
+        Post.objects.filter(pk=instance.post_id), 'comments_count', -1
+    )
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance: Follow, created: bool, raw: bool,
+                 **kwargs) -> None:
+    """Count a new follow for both users."""
+    if created and not raw:
+        counters.add_to_user(instance.author_id, 'followers_count', 1)
+        counters.add_to_user(instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance: Follow, **kwargs) -> None:
+    """Uncount a removed follow for both users."""
+    counters.add_to_user(instance.author_id, 'followers_count', -1)
+    counters.add_to_user(instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance: Post, created: bool, raw: bool,
+                 **kwargs) -> None:
+    """Push a new post into the followers' timelines."""
+    if created and not raw:
+        timeline.push(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance: Follow, created: bool, raw: bool,
+                      **kwargs) -> None:
+    """Fill the follower's timeline with the author's posts."""
+    if created and not raw:
+        timeline.backfill(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def evict_timeline(sender, instance: Follow, **kwargs) -> None:
+    """Remove the author's posts from the former follower's timeline."""
+    timeline.evict(instance)
+    timeline.backfill_if_demoted(instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance: Comment, created: bool, raw: bool,
+                  **kwargs) -> None:
+    """Raise the trending score of the commented post."""
+    if created and not raw:
+        trending.record(instance)
+
+
+@receiver(post_save, sender=Post)
+def move_trending_post(sender, instance: Post, created: bool, raw: bool,
+                       **kwargs) -> None:
+    """Move the post to the trending list of its new group."""
+    if not created and not raw and (
+        instance._stored_group_id != instance.group_id
+    ):
+        trending.move(instance, instance._stored_group_id)
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance: Post, raw: bool,
+                           **kwargs) -> None:
+    """Queue the variants of a new or replaced image."""
+    if not raw and instance.image and (
+        instance.image.name != instance._stored_image
+    ):
+        thumbnails.schedule(instance)
+
+
+@receiver(post_save, sender=ModerationJob)
+def start_moderation_job(sender, instance: ModerationJob, created: bool,
+                         raw: bool, **kwargs) -> None:
+    """Run a new moderation job in the background."""
+    if created and not raw:
+        moderation.schedule(instance)
+
+
+@receiver(post_delete, sender=ImageVariant)
+def delete_variant_file(sender, instance: ImageVariant, **kwargs) -> None:
+    """Remove the file of a replaced or deleted image variant."""
+    instance.file.delete(save=False)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance: Post, raw: bool, **kwargs) -> None:
+    """Add the post to the search index, or refresh its text."""
+    if not raw:
+        search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance: Post, **kwargs) -> None:
+    """Remove the post from the search index."""
+    search.unindex_post(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance: Comment, raw: bool, **kwargs) -> None:
+    """Add the comment to the search index, or refresh its text."""
+    if not raw:
+        search.index_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def unindex_comment(sender, instance: Comment, **kwargs) -> None:
+    """Remove the comment from the search index."""
+    search.unindex_comment(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def invalidate_saved_post(sender, instance: Post, raw: bool,
+                          **kwargs) -> None:
+    """Drop the cached feeds showing the post."""
+    if not raw:
+        fragments.invalidate_post(
+            instance.author_id, instance.group_id, instance._stored_group_id
+        )
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_deleted_post(sender, instance: Post, **kwargs) -> None:
+    """Drop the cached feeds showing the post."""
+    fragments.invalidate_post(instance.author_id, instance.group_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance: Comment, **kwargs) -> None:
+    """Refresh the comment count on the cards of the post."""
+    if kwargs.get('raw'):
+        return
+    post = Post.objects.filter(pk=instance.post_id).values(
+        'author_id', 'group_id'
+    ).first()
+    if post is not None:
+        fragments.invalidate_post(post['author_id'], post['group_id'])
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group(sender, instance: Group, **kwargs) -> None:
+    """Refresh group titles and group feeds."""
+    cache.bump(fragments.POSTS, fragments.GROUPS, fragments.group(instance.pk))
+
+
+@receiver(pre_save, sender=User)
+def remember_names(sender, instance: User, raw: bool, update_fields=None,
+                   **kwargs) -> None:
+    """Keep the stored names so a save can tell if the feed cards change.
+
+    Saves of other fields only, like the ``last_login`` update on login or
+    a password rehash, don't look them up.
+    """
+    instance._stored_names = None
+    if instance.pk and not raw and (
+        update_fields is None or not update_fields.isdisjoint(CARD_FIELDS)
+    ):
+        instance._stored_names = User.objects.filter(
+            pk=instance.pk
+        ).values_list(*CARD_FIELDS).first()
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance: User, **kwargs) -> None:
+    """Refresh the author names shown on the feed cards."""
+    stored = getattr(instance, '_stored_names', None)
+    names = tuple(getattr(instance, field) for field in CARD_FIELDS)
+    if stored is not None and stored != names:
+        cache.bump(fragments.POSTS, fragments.profile(instance.pk))
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_user(sender, instance: User, **kwargs) -> None:
+    """Drop the cached feeds showing the author's posts."""
+    cache.bump(fragments.POSTS, fragments.profile(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance: Follow, **kwargs) -> None:
+    """Refresh the follow feed of the follower."""
+    cache.bump(fragments.follow(instance.user_id))
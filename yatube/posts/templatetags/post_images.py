@@ -0,0 +1,51 @@
+from django import template
+
+from .. import thumbnails
+from ..models import ImageVariant
+
+register = template.Library()
+
+MIME_TYPES = {
+    ImageVariant.WEBP: 'image/webp',
+    ImageVariant.JPEG: 'image/jpeg',
+}
+# The card spans the content column: the full width on phones and about
+# three quarters of the 1320px container on desktops.
+SIZES = '(min-width: 768px) 75vw, 100vw'
+
+
+def srcset(variants) -> str:
+    return ', '.join(
+        f'{variant.file.url} {variant.width}w' for variant in variants
+    )
+
+
+@register.inclusion_tag('includes/post_picture.html')
+def post_picture(post, sizes: str = SIZES) -> dict:
+    """``<picture>`` of the post image variants, or a placeholder.
+
+    Missing variants are queued instead of being generated during the
+    request, unless they recently failed. Usage::
+
+        {% post_picture post %}
+    """
+    if not post.image:
+        return {}
+    variants = thumbnails.current(post)
+    fallback = [v for v in variants if v.format == ImageVariant.JPEG]
+    if not fallback:
+        thumbnails.retry(post)
+        return {'pending': True}
+    sources = [
+        {'type': MIME_TYPES[image_format], 'srcset': srcset(
+            [v for v in variants if v.format == image_format]
+        )}
+        for image_format in thumbnails.formats()
+        if image_format != ImageVariant.JPEG
+    ]
+    return {
+        'sources': [source for source in sources if source['srcset']],
+        'fallback': fallback[-1],
+        'srcset': srcset(fallback),
+        'sizes': sizes,
+    }
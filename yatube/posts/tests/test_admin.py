@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from core.paginator import EstimatedCountPaginator
+
+from ..admin import TEXT_PREVIEW_LENGTH
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+# Session, user, estimated count and page.
+CHANGELIST_QUERIES = 4
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        cls.group = Group.objects.create(title='Group', slug='group')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.admin, group=cls.group, text=f'{i} ' + 'x' * 200
+            )
+            for i in range(3)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.admin, text='y' * 200
+        )
+
+    def setUp(self) -> None:
+        self.client.force_login(self.admin)
+
+    def test_changelists_show_text_previews(self) -> None:
+        for model in ('post', 'comment'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertLessEqual(
+                    int(response['X-Query-Count']), CHANGELIST_QUERIES
+                )
+                objects = response.context['cl'].result_list
+                self.assertTrue(objects)
+                for obj in objects:
+                    self.assertEqual(len(obj.text), TEXT_PREVIEW_LENGTH)
+
+    def test_filtered_changelist(self) -> None:
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': '1'}
+        )
+
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.posts[1]]
+        )
+
+    def test_estimated_count(self) -> None:
+        Post.objects.filter(pk=self.posts[1].pk).delete()
+        last = self.posts[-1].pk
+
+        self.assertEqual(EstimatedCountPaginator(Post.objects.all(), 10)
+                         .count, last)
+        self.assertEqual(
+            EstimatedCountPaginator(
+                Post.objects.filter(author=self.admin), 10
+            ).count,
+            2,
+        )
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        cls.other_group = Group.objects.create(
+            title='Other group',
+            slug='other-slug',
+            description='Other description',
+        )
+
+    def counters(self, user) -> UserCounters:
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counts_follow_create_edit_and_delete(self) -> None:
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Text'
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.counters(self.author).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_comment_count(self) -> None:
+        post = Post.objects.create(author=self.author, text='Text')
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Comment'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counts(self) -> None:
+        follow = Follow.objects.create(author=self.author, user=self.reader)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+
+        follow.delete()
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 0)
+
+    def test_reconcile_fixes_drift(self) -> None:
+        post = Post.objects.create(
+            author=self.author, group=self.group, text='Text'
+        )
+        Follow.objects.create(author=self.author, user=self.reader)
+        UserCounters.objects.update(
+            posts_count=7, followers_count=7, following_count=7
+        )
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        call_command('reconcile_counters', stdout=StringIO())
+        counters = self.counters(self.author)
+        post.refresh_from_db()
+        self.group.refresh_from_db()
+
+        self.assertEqual(counters.posts_count, 1)
+        self.assertEqual(counters.followers_count, 1)
+        self.assertEqual(counters.following_count, 0)
+        self.assertEqual(self.counters(self.reader).following_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(post.comments_count, 0)
+
+    def test_profile_reads_counter(self) -> None:
+        Post.objects.create(author=self.author, text='Text')
+        UserCounters.objects.filter(user=self.author).update(posts_count=42)
+        resp = self.client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+
+        self.assertEqual(resp.context['count'], 42)
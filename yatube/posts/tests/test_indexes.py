@@ -0,0 +1,79 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..views import POSTS_PER_PAGE
+
+User = get_user_model()
+FULL_SCAN = re.compile(r'^SCAN (TABLE )?(posts_\w+|auth_user)$')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+class FeedQueryPlanTests(TestCase):
+    """Feed queries must be index range scans without sorting."""
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Follow.objects.create(author=cls.author, user=cls.reader)
+        for i in range(POSTS_PER_PAGE * 2):
+            cls.post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Text {i}'
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Comment {i}'
+            )
+
+    def setUp(self) -> None:
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def assertIndexed(self, url: str):
+        """Check the plan of every SELECT issued for ``url``.
+
+        Returns the response so the caller can follow its cursors.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        with connection.cursor() as cursor:
+            for query in context.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                for row in cursor.fetchall():
+                    with self.subTest(url=url, sql=sql):
+                        self.assertNotRegex(row[-1], FULL_SCAN)
+                        self.assertNotRegex(row[-1], TEMP_SORT)
+        return response
+
+    def test_feed_queries_use_indexes(self) -> None:
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.author}),
+            reverse('posts:follow_index'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:trending'),
+            reverse('posts:group_trending', kwargs={'slug': self.group.slug}),
+        ]
+        for url in urls:
+            response = self.assertIndexed(url)
+            page = response.context.get('page_obj')
+            if getattr(page, 'next_cursor', None):
+                self.assertIndexed(f'{url}?cursor={page.next_cursor}')
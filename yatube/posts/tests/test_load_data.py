@@ -0,0 +1,103 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from .. import search
+from ..models import (
+    Comment, Follow, Group, Post, TimelineEntry, User, UserCounters,
+)
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class LoadDataTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        call_command(
+            'generate_load_data',
+            users=20,
+            groups=3,
+            posts=100,
+            comments=200,
+            follows=5,
+            stdout=StringIO(),
+        )
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_rows_are_generated(self) -> None:
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 100)
+        self.assertEqual(Comment.objects.count(), 200)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(Post.objects.exclude(image='').exists())
+        self.assertGreater(
+            Post.objects.values('pub_date').distinct().count(), 1
+        )
+
+    def test_images_are_kept_apart_and_deleted_on_request(self) -> None:
+        directory = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'load')
+        names = {
+            os.path.relpath(name, 'posts/load')
+            for name in Post.objects.exclude(image='').values_list(
+                'image', flat=True
+            )
+        }
+        self.assertLessEqual(names, set(os.listdir(directory)))
+
+        call_command(
+            'generate_load_data', delete_images=True, stdout=StringIO()
+        )
+
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_rerun_with_the_same_prefix_is_refused(self) -> None:
+        with self.assertRaises(CommandError):
+            call_command('generate_load_data', users=5, stdout=StringIO())
+
+        self.assertEqual(User.objects.count(), 20)
+
+    def test_derived_data_is_rebuilt(self) -> None:
+        follow = Follow.objects.first()
+        counters = UserCounters.objects.get(user=follow.author)
+        post = Post.objects.order_by('-comments_count').first()
+
+        self.assertEqual(
+            counters.followers_count, follow.author.following.count()
+        )
+        self.assertEqual(post.comments_count, post.comments.count())
+        self.assertTrue(TimelineEntry.objects.filter(
+            user_id=follow.user_id, author_id=follow.author_id
+        ).exists())
+        word = post.text.split()[0]
+        self.assertTrue(search.filter_matching(Post.objects, word).exists())
+
+    def test_benchmark_saves_and_compares_results(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.json')
+            call_command(
+                'benchmark_urls', requests=2, output=path, stdout=StringIO()
+            )
+            with open(path) as file:
+                results = json.load(file)['urls']
+            out = StringIO()
+            call_command(
+                'benchmark_urls', requests=2, compare=path, stdout=out
+            )
+
+        self.assertEqual(results['index']['status'], 200)
+        self.assertIn('p99_ms', results['post_detail'])
+        self.assertNotIn('delete_comment', results)
+        self.assertIn('queries)', out.getvalue())
@@ -0,0 +1,190 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import moderation, search, trending
+from ..models import (
+    Comment, Follow, Group, ModerationJob, Post, TimelineEntry,
+    TrendingEntry, UserCounters,
+)
+
+User = get_user_model()
+
+
+@override_settings(MODERATION_BATCH_SIZE=2, MODERATION_PAUSE=0)
+class ModerationTests(TestCase):
+    def setUp(self) -> None:
+        self.spammer = User.objects.create_user(username='spammer')
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        self.group = Group.objects.create(title='Group', slug='group')
+        self.other = Group.objects.create(title='Other', slug='other')
+        self.spam = [
+            Post.objects.create(
+                author=self.spammer, group=self.group, text=f'spam {i}'
+            )
+            for i in range(5)
+        ]
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Post'
+        )
+        Comment.objects.create(
+            post=self.spam[0], author=self.author, text='reply'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text='spam comment'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='answer'
+        )
+
+    def run_job(self, **fields) -> ModerationJob:
+        job = ModerationJob.objects.create(**fields)
+        moderation.run(job)
+        job.refresh_from_db()
+        return job
+
+    def test_delete_posts_of_author(self) -> None:
+        job = self.run_job(
+            action=ModerationJob.DELETE_POSTS, author=self.spammer
+        )
+
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual((job.processed, job.total), (5, 5))
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertFalse(TrendingEntry.objects.exclude(post=self.post)
+                         .exists())
+        self.assertEqual(
+            UserCounters.objects.get(user=self.spammer).posts_count, 0
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertFalse(search.filter_matching(Post.objects, 'spam')
+                         .exists())
+        self.assertFalse(search.filter_matching(Comment.objects, 'reply')
+                         .exists())
+
+    def test_delete_comments_by_date(self) -> None:
+        Comment.objects.filter(text='answer').update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        job = self.run_job(
+            action=ModerationJob.DELETE_COMMENTS,
+            group=self.group,
+            date_from=timezone.now() - timedelta(days=1),
+        )
+
+        self.assertEqual(job.processed, 2)
+        self.assertEqual(
+            list(Comment.objects.values_list('text', flat=True)), ['answer']
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_move_posts(self) -> None:
+        trending.rebuild()
+        job = self.run_job(
+            action=ModerationJob.MOVE_POSTS,
+            author=self.spammer,
+            target_group=self.other,
+        )
+
+        self.assertEqual(job.processed, 5)
+        self.assertEqual(
+            set(Post.objects.filter(group=self.other)), set(self.spam)
+        )
+        self.group.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(
+            (self.group.posts_count, self.other.posts_count), (1, 5)
+        )
+        self.assertTrue(TrendingEntry.objects.filter(
+            group=self.other, post=self.spam[0]
+        ).exists())
+        self.assertFalse(TrendingEntry.objects.filter(
+            group=self.group, post=self.spam[0]
+        ).exists())
+
+    def test_interrupted_job_resumes(self) -> None:
+        job = ModerationJob.objects.create(
+            action=ModerationJob.DELETE_POSTS,
+            author=self.spammer,
+            status=ModerationJob.RUNNING,
+            position=self.spam[2].pk,
+            processed=3,
+        )
+        ModerationJob.objects.filter(pk=job.pk).update(
+            updated=timezone.now() - timedelta(hours=1)
+        )
+
+        call_command('run_moderation_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.processed, job.total), (5, 5))
+        self.assertEqual(
+            Post.objects.filter(author=self.spammer).count(), 3
+        )
+
+    def test_job_running_elsewhere_is_not_resumed(self) -> None:
+        job = ModerationJob.objects.create(
+            action=ModerationJob.DELETE_POSTS,
+            author=self.spammer,
+            status=ModerationJob.RUNNING,
+        )
+
+        call_command('run_moderation_jobs', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ModerationJob.RUNNING)
+        self.assertEqual(
+            Post.objects.filter(author=self.spammer).count(), 5
+        )
+        self.assertFalse(moderation.run(job))
+
+    def test_every_post_relation_is_deleted(self) -> None:
+        self.assertEqual(
+            {
+                relation.related_model
+                for relation in Post._meta.related_objects
+            },
+            set(moderation.POST_DEPENDENTS),
+        )
+
+    def test_job_needs_a_filter(self) -> None:
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:posts_moderationjob_add')
+
+        response = self.client.post(url, {'action': 'delete_posts'})
+        self.assertContains(response, 'Choose at least one filter.')
+        self.client.post(url, {
+            'action': 'delete_posts', 'author': self.spammer.pk
+        })
+        self.assertEqual(
+            ModerationJob.objects.get().created_by, admin
+        )
+
+    def test_action_queues_jobs_for_selected_authors(self) -> None:
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='password'
+        )
+        self.client.force_login(admin)
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'delete_posts_by_authors',
+            '_selected_action': [self.spam[0].pk, self.spam[1].pk],
+        })
+
+        job = ModerationJob.objects.get()
+        self.assertEqual(
+            (job.action, job.author), ('delete_posts', self.spammer)
+        )
@@ -0,0 +1,150 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from core.stemmer import stem
+from .. import search
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class StemmerTests(TestCase):
+    def test_word_forms_share_a_stem(self) -> None:
+        forms = [
+            ('котики', 'котиков', 'котиками'),
+            ('кошка', 'кошки', 'кошкой'),
+            ('бегали', 'бегает', 'бегать'),
+            ('ёжик', 'ежики'),
+        ]
+        for words in forms:
+            with self.subTest(words=words):
+                self.assertEqual(len({stem(word) for word in words}), 1)
+
+    def test_latin_words_are_only_lowercased(self) -> None:
+        self.assertEqual(stem('Django'), 'django')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def search(self, query: str):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return response, list(response.context['page_obj'])
+
+    def test_word_forms_are_found(self) -> None:
+        post = Post.objects.create(author=self.author, text='Котики спят')
+        Post.objects.create(author=self.author, text='Собаки гуляют')
+
+        _, found = self.search('котиков')
+
+        self.assertEqual(found, [post])
+
+    def test_post_matches_rank_above_comment_matches(self) -> None:
+        commented = Post.objects.create(author=self.author, text='Утро')
+        Comment.objects.create(
+            post=commented, author=self.author, text='Котик проснулся'
+        )
+        post = Post.objects.create(author=self.author, text='Котик уснул')
+
+        _, found = self.search('котик')
+
+        self.assertEqual(found, [post, commented])
+
+    def test_index_follows_edits_and_deletes(self) -> None:
+        post = Post.objects.create(author=self.author, text='Котик')
+        post.text = 'Собака'
+        post.save()
+        self.assertEqual(self.search('котик')[1], [])
+        self.assertEqual(self.search('собака')[1], [post])
+
+        post.delete()
+        self.assertEqual(self.search('собака')[1], [])
+
+    def test_cursor_pages_walk_all_results(self) -> None:
+        Post.objects.bulk_create([
+            Post(author=self.author, text='котик ' * (i % 3 + 1))
+            for i in range(25)
+        ])
+        search.rebuild()
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(
+                reverse('posts:search'), {'q': 'котик', 'cursor': cursor}
+            )
+            page = response.context['page_obj']
+            seen += [post.pk for post in page]
+            ranks = [post.search_rank for post in page]
+            self.assertEqual(ranks, sorted(ranks, reverse=True))
+            cursor = page.next_cursor
+            if not cursor:
+                break
+
+        self.assertCountEqual(seen, Post.objects.values_list('pk', flat=True))
+
+    def test_empty_query_finds_nothing(self) -> None:
+        Post.objects.create(author=self.author, text='Котик')
+
+        response, found = self.search('  ')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(found, [])
+
+    def test_rebuild_command_indexes_existing_posts(self) -> None:
+        post = Post.objects.create(author=self.author, text='Котик')
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {search.POST_TABLE}')
+        out = StringIO()
+
+        call_command('rebuild_search_index', stdout=out)
+
+        self.assertIn('Indexed 1 posts', out.getvalue())
+        self.assertEqual(self.search('котик')[1], [post])
+
+    def test_admin_search_uses_the_index(self) -> None:
+        post = Post.objects.create(author=self.author, text='Котики')
+        comment = Comment.objects.create(
+            post=post, author=self.author, text='Кошечка'
+        )
+
+        self.assertEqual(
+            list(search.filter_matching(Post.objects.all(), 'котик')), [post]
+        )
+        self.assertEqual(
+            list(search.filter_matching(Comment.objects.all(), 'кошечки')),
+            [comment],
+        )
+
+    def test_search_without_index_matches_substrings(self) -> None:
+        with connection.cursor() as cursor:
+            for table in (search.POST_TABLE, search.COMMENT_TABLE):
+                cursor.execute(f'DROP TABLE {table}')
+        search._available.clear()
+        self.addCleanup(search._available.clear)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Cats {i} nap')
+            for i in range(12)
+        ]
+        Post.objects.create(author=self.author, text='Dogs nap')
+
+        seen = []
+        cursor = ''
+        while True:
+            response = self.client.get(
+                reverse('posts:search'), {'q': 'cats NAP', 'cursor': cursor}
+            )
+            seen += list(response.context['page_obj'])
+            cursor = response.context['page_obj'].next_cursor
+            if not cursor:
+                break
+
+        self.assertFalse(search.available())
+        self.assertEqual(seen, posts[::-1])
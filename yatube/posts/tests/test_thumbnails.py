@@ -0,0 +1,172 @@
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import thumbnails
+from ..models import ImageVariant, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+def image(name: str = 'small.gif') -> SimpleUploadedFile:
+    return SimpleUploadedFile(name, SMALL_GIF, content_type='image/gif')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self) -> None:
+        cache.clear()
+        on_commit = mock.patch(
+            'posts.thumbnails.transaction.on_commit',
+            side_effect=lambda callback: callback(),
+        )
+        on_commit.start()
+        self.addCleanup(on_commit.stop)
+        submit = mock.patch('posts.thumbnails.submit')
+        self.submit = submit.start()
+        self.addCleanup(submit.stop)
+
+    def test_new_and_replaced_images_are_queued(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+        self.submit.assert_called_once_with(post.pk)
+
+        post.text = 'Edited'
+        post.save()
+        self.submit.assert_called_once_with(post.pk)
+
+        post.image = image('other.gif')
+        post.save()
+        self.assertEqual(self.submit.call_count, 2)
+
+    def test_page_shows_placeholder_without_resizing(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+        with mock.patch('posts.thumbnails.Image.open') as image_open:
+            response = self.client.get(reverse('posts:index'))
+
+        image_open.assert_not_called()
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.assertEqual(thumbnails.current(post), [])
+
+    def test_failed_image_is_not_queued_again_by_pages(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image('broken.gif')
+        )
+        with open(post.image.path, 'wb') as file:
+            file.write(b'not an image')
+        self.submit.reset_mock()
+
+        thumbnails._run(post.pk)
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertContains(response, 'Изображение обрабатывается')
+        self.submit.assert_not_called()
+
+        post.image = image('fixed.gif')
+        post.save()
+        self.submit.reset_mock()
+        self.client.get(reverse('posts:index'))
+
+        self.submit.assert_called_with(post.pk)
+
+    def test_variants_cover_every_width_and_format(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+
+        self.assertTrue(thumbnails.generate(post.pk))
+        self.assertFalse(thumbnails.generate(post.pk))
+
+        variants = thumbnails.current(post)
+        self.assertCountEqual(
+            [(variant.width, variant.format) for variant in variants],
+            [
+                (width, image_format)
+                for width in thumbnails.WIDTHS
+                for image_format in thumbnails.formats()
+            ],
+        )
+        for variant in variants:
+            self.assertEqual(
+                variant.height,
+                round(variant.width * 339 / 960),
+            )
+
+    def test_generated_variants_replace_placeholder(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+        self.client.get(reverse('posts:index'))
+        thumbnails.generate(post.pk)
+
+        response = self.client.get(reverse('posts:index'))
+
+        self.assertNotContains(response, 'Изображение обрабатывается')
+        self.assertContains(response, '<picture>')
+        for variant in thumbnails.current(post):
+            self.assertContains(
+                response, f'{variant.file.url} {variant.width}w'
+            )
+
+    def test_replaced_image_drops_old_variants(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+        thumbnails.generate(post.pk)
+        old_files = list(ImageVariant.objects.values_list('file', flat=True))
+        post.image = image('other.gif')
+        post.save()
+
+        self.assertEqual(thumbnails.current(post), [])
+        thumbnails.generate(post.pk)
+
+        self.assertEqual(
+            ImageVariant.objects.filter(file__in=old_files).count(), 0
+        )
+        self.assertEqual(
+            len(thumbnails.current(post)),
+            len(thumbnails.WIDTHS) * len(thumbnails.formats()),
+        )
+
+    def test_command_fills_missing_thumbnails(self) -> None:
+        post = Post.objects.create(
+            author=self.author, text='Text', image=image()
+        )
+        Post.objects.create(author=self.author, text='No image')
+        out = StringIO()
+
+        call_command('pregenerate_thumbnails', workers=1, stdout=out)
+
+        self.assertIn('for 1 posts.', out.getvalue())
+        self.assertNotEqual(thumbnails.current(post), [])
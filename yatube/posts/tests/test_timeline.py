@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.old_post = Post.objects.create(author=cls.author, text='Old')
+
+    def setUp(self) -> None:
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self) -> list:
+        resp = self.reader_client.get(reverse('posts:follow_index'))
+        return list(resp.context['page_obj'])
+
+    def test_follow_backfills_and_new_posts_fan_out(self) -> None:
+        Follow.objects.create(author=self.author, user=self.reader)
+        new_post = Post.objects.create(author=self.author, text='New')
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_unfollow_evicts_author_posts(self) -> None:
+        follow = Follow.objects.create(author=self.author, user=self.reader)
+        follow.delete()
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    def test_deleted_post_leaves_timeline(self) -> None:
+        Follow.objects.create(author=self.author, user=self.reader)
+        post = Post.objects.create(author=self.author, text='Deleted')
+        post.delete()
+
+        self.assertEqual(self.feed(), [self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_celebrity_posts_are_merged_on_read(self) -> None:
+        Follow.objects.create(author=self.author, user=self.reader)
+        new_post = Post.objects.create(author=self.author, text='New')
+
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1)
+    def test_former_celebrity_is_backfilled(self) -> None:
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(author=self.author, user=self.reader)
+        follow = Follow.objects.create(author=self.author, user=other)
+        new_post = Post.objects.create(author=self.author, text='New')
+        follow.delete()
+
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.feed(), [new_post, self.old_post])
+
+    def test_rebuild_command_restores_timelines(self) -> None:
+        Follow.objects.create(author=self.author, user=self.reader)
+        TimelineEntry.objects.all().delete()
+        call_command('rebuild_timelines', stdout=StringIO())
+
+        self.assertEqual(self.feed(), [self.old_post])
@@ -0,0 +1,118 @@
+import math
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import QueryBudgetMixin
+
+from .. import trending
+from ..models import Comment, Group, Post, TrendingEntry
+
+User = get_user_model()
+
+
+class TrendingTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='user')
+        cls.group = Group.objects.create(
+            title='Test group', slug='test-slug', description='Description'
+        )
+        cls.old, cls.hot, cls.quiet = (
+            Post.objects.create(author=cls.user, group=cls.group, text=text)
+            for text in ('Old', 'Hot', 'Quiet')
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.now = timezone.now()
+
+    def comment(self, post: Post, age: timedelta = timedelta()) -> Comment:
+        created = self.now - age
+        with mock.patch('django.utils.timezone.now', return_value=created):
+            return Comment.objects.create(
+                post=post, author=self.user, text='Comment'
+            )
+
+    def score(self, post: Post) -> float:
+        post.refresh_from_db()
+        return post.trending_score
+
+    def test_recent_comments_weigh_more(self) -> None:
+        half_life = timedelta(seconds=settings.TRENDING_HALF_LIFE)
+        self.comment(self.old, age=half_life)
+        self.comment(self.old, age=half_life)
+        self.comment(self.hot)
+
+        self.assertAlmostEqual(self.score(self.old), self.score(self.hot))
+        self.comment(self.hot)
+        self.assertAlmostEqual(
+            self.score(self.hot) - self.score(self.old), math.log(2)
+        )
+
+    def test_feeds_rank_posts_by_score(self) -> None:
+        self.comment(self.old, age=timedelta(days=2))
+        self.comment(self.hot)
+        self.comment(self.hot)
+
+        for url in (
+            reverse('posts:trending'),
+            reverse('posts:group_trending', kwargs={'slug': 'test-slug'}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    list(response.context['page_obj']), [self.hot, self.old]
+                )
+                self.assertWithinQueryBudget(response)
+
+    @override_settings(TRENDING_SIZE=2)
+    def test_top_lists_keep_only_the_best_posts(self) -> None:
+        self.comment(self.old, age=timedelta(days=2))
+        self.comment(self.quiet, age=timedelta(days=1))
+        self.comment(self.hot)
+
+        for group in (None, self.group):
+            with self.subTest(group=group):
+                self.assertCountEqual(
+                    TrendingEntry.objects.filter(group=group).values_list(
+                        'post_id', flat=True
+                    ),
+                    [self.hot.pk, self.quiet.pk],
+                )
+
+    def test_post_moves_to_new_group_list(self) -> None:
+        other = Group.objects.create(title='Other', slug='other')
+        self.comment(self.hot)
+        self.hot.refresh_from_db()
+        self.hot.group = other
+        self.hot.save()
+
+        self.assertFalse(TrendingEntry.objects.filter(
+            group=self.group, post=self.hot
+        ).exists())
+        self.assertTrue(TrendingEntry.objects.filter(
+            group=other, post=self.hot
+        ).exists())
+
+    def test_rebuild_matches_incremental_scores(self) -> None:
+        self.comment(self.old, age=timedelta(hours=5))
+        self.comment(self.hot)
+        self.comment(self.hot, age=timedelta(hours=1))
+        scores = {post: self.score(post) for post in (self.old, self.hot)}
+        entries = set(TrendingEntry.objects.values_list('group', 'post'))
+        Post.objects.update(trending_score=None)
+
+        self.assertEqual(trending.rebuild(), 2)
+        for post, score in scores.items():
+            self.assertAlmostEqual(self.score(post), score)
+        self.assertEqual(
+            set(TrendingEntry.objects.values_list('group', 'post')), entries
+        )
@@ -1,17 +1,23 @@
 import shutil
 import tempfile
+from unittest import mock
 
 from django import forms
 from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.paginator import NEXT, CursorPaginator
+from core.testing import QueryBudgetMixin
+
 from ..forms import PostForm
-from ..models import Follow, Group, Post
-from ..views import POSTS_PER_PAGE
+from ..models import Comment, Follow, Group, Post
+from ..views import COMMENTS_PER_PAGE, POSTS_PER_PAGE
 
 User = get_user_model()
 # Для проверки паджинатора, количество постов > 10 (POSTS_PER_PAGE = 10)
@@ -178,20 +184,55 @@ class PostPagesTests(TestCase):
         ).exists())
 
     def test_cache_index_page(self) -> None:
+        cache.clear()
         resp1 = self.client.get(reverse('posts:index'))
         check1 = resp1.content
-        Post.objects.get(author=self.user).delete()
+        Post.objects.filter(pk=self.post.pk).update(text='Changed text')
         resp2 = self.client.get(reverse('posts:index'))
         check2 = resp2.content
 
-        self.assertEqual(Post.objects.count(), 0, 'The post is still in DB')
         self.assertEqual(check1, check2, "Cache doesn't work.")
 
-        cache.clear()
+        Post.objects.get(pk=self.post.pk).delete()
         resp3 = self.client.get(reverse('posts:index'))
         check3 = resp3.content
 
-        self.assertNotEqual(check1, check3, 'Cache is not cleared')
+        self.assertEqual(Post.objects.count(), 0, 'The post is still in DB')
+        self.assertNotEqual(check1, check3, 'Cache is not invalidated')
+
+    def test_feed_caches_follow_author_names_only(self) -> None:
+        author = User.objects.create_user(username='renamed')
+        Post.objects.create(author=author, text='Post of renamed')
+        url = reverse('posts:index')
+        with mock.patch('core.cache.bump') as bump:
+            author.save(update_fields=['password'])
+            author.save(update_fields=['last_login'])
+            author.save()
+        bump.assert_not_called()
+
+        self.client.get(url)
+        author.first_name = 'Renamed'
+        author.save()
+
+        self.assertContains(self.client.get(url), 'Renamed')
+
+    def test_feed_caches_are_invalidated_by_new_posts(self) -> None:
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:follow_index'),
+        ]
+        for url in urls:
+            self.follower_client.get(url)
+        Post.objects.create(
+            author=self.user, group=self.group, text='Fresh post'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                resp = self.follower_client.get(url)
+
+                self.assertContains(resp, 'Fresh post')
 
 
 class PaginatorViewsTest(TestCase):
@@ -219,6 +260,7 @@ class PaginatorViewsTest(TestCase):
         )
 
     def setUp(self) -> None:
+        cache.clear()
         self.authorized_client = Client()
         self.follower_client = Client()
         self.authorized_client.force_login(self.user)
@@ -254,7 +296,10 @@ class PaginatorViewsTest(TestCase):
         }
         for key in urls.keys():
             with self.subTest(key=key):
-                resp = self.client.get(urls[key] + '?page=2')
+                cursor = self.client.get(
+                    urls[key]
+                ).context['page_obj'].next_cursor
+                resp = self.client.get(urls[key], {'cursor': cursor})
                 check = POSTS_LIST - POSTS_PER_PAGE
                 if check >= POSTS_PER_PAGE:
                     self.assertEqual(
@@ -278,8 +323,11 @@ class PaginatorViewsTest(TestCase):
         )
 
     def test_last_follow_index_page(self) -> None:
+        cursor = self.follower_client.get(
+            reverse('posts:follow_index')
+        ).context['page_obj'].next_cursor
         resp = self.follower_client.get(
-            reverse('posts:follow_index') + '?page=2'
+            reverse('posts:follow_index'), {'cursor': cursor}
         )
         check = POSTS_LIST - POSTS_PER_PAGE
         if check >= POSTS_PER_PAGE:
@@ -294,6 +342,319 @@ class PaginatorViewsTest(TestCase):
                 f'Last {resp} page - paginator error(2).'
             )
 
+    def test_cursor_pages_walk_the_whole_feed(self) -> None:
+        url = reverse('posts:index')
+        seen = []
+        cursor = None
+        while True:
+            page_obj = self.client.get(url, {'cursor': cursor or ''}).context[
+                'page_obj'
+            ]
+            seen.extend(post.pk for post in page_obj)
+            cursor = page_obj.next_cursor
+            if cursor is None:
+                break
+        expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+        self.assertEqual(seen, expected)
+        self.assertFalse(page_obj.has_next())
+
+    def test_previous_cursor_returns_previous_page(self) -> None:
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        second = self.client.get(
+            url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            url, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+
+        self.assertEqual(second.number, 2)
+        self.assertEqual(list(back), list(first))
+        self.assertEqual(back.number, 1)
+        self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_falls_back_to_first_page(self) -> None:
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        resp = self.client.get(url, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(list(resp.context['page_obj']), list(first))
+
+    def test_cursor_past_the_end_falls_back_to_first_page(self) -> None:
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        oldest = Post.objects.order_by('pub_date', 'pk').first()
+        cursor = CursorPaginator(
+            Post.objects.all(), POSTS_PER_PAGE
+        ).encode_cursor(oldest, NEXT, 5)
+
+        page_obj = self.client.get(url, {'cursor': cursor}).context[
+            'page_obj'
+        ]
+
+        self.assertEqual(list(page_obj), list(first))
+        self.assertFalse(page_obj.has_previous())
+
+
+class FeedQueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.follower = User.objects.create_user(username='follower')
+        cls.group = Group.objects.create(
+            title='Test group',
+            slug='test-slug',
+            description='Test description',
+        )
+        Follow.objects.create(author=cls.user, user=cls.follower)
+        for i in range(POSTS_PER_PAGE + 5):
+            cls.post = Post.objects.create(
+                author=cls.user,
+                group=cls.group,
+                text=f'Test text {i}',
+            )
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text='Comment'
+            )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.follower_client = Client()
+        self.follower_client.force_login(self.follower)
+
+    def test_feeds_stay_within_query_budget(self) -> None:
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=text',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                cache.clear()
+
+                self.assertWithinQueryBudget(self.follower_client.get(url))
+
+    def test_feed_queries_do_not_depend_on_page_size(self) -> None:
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:follow_index'),
+            reverse('posts:search') + '?q=text',
+        ]
+        for url in urls:
+            queries = []
+            for per_page in (1, POSTS_PER_PAGE):
+                cache.clear()
+                with mock.patch('posts.views.POSTS_PER_PAGE', per_page):
+                    with CaptureQueriesContext(connection) as context:
+                        self.follower_client.get(url)
+                queries.append(len(context))
+            with self.subTest(url=url):
+                self.assertEqual(queries[0], queries[1])
+
+
+class CommentPaginationTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(author=cls.author, text='Test post')
+        for i in range(COMMENTS_PER_PAGE + 5):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.reader if i % 2 else cls.author,
+                text=f'Comment {i}',
+            )
+
+    def setUp(self) -> None:
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        self.comments_url = reverse(
+            'posts:comments', kwargs={'post_id': self.post.pk}
+        )
+
+    def test_post_page_shows_first_comments_and_more_link(self) -> None:
+        response = self.reader_client.get(self.detail_url)
+        comments = response.context['comments']
+
+        self.assertEqual(len(comments), COMMENTS_PER_PAGE)
+        self.assertContains(
+            response, f'{self.comments_url}?cursor={comments.next_cursor}'
+        )
+        self.assertWithinQueryBudget(response)
+
+    def test_fragment_pages_walk_all_comments(self) -> None:
+        first_page = self.reader_client.get(self.detail_url).context[
+            'comments'
+        ]
+        seen = list(first_page)
+        cursor = first_page.next_cursor
+        while cursor:
+            response = self.reader_client.get(
+                self.comments_url, {'cursor': cursor}
+            )
+            self.assertTemplateNotUsed(response, 'base.html')
+            self.assertWithinQueryBudget(response)
+            seen += list(response.context['comments'])
+            cursor = response.context['comments'].next_cursor
+
+        self.assertEqual(
+            seen, list(Comment.objects.filter(post=self.post))
+        )
+
+    def test_comments_of_missing_post_are_not_found(self) -> None:
+        response = self.reader_client.get(
+            reverse('posts:comments', kwargs={'post_id': 0})
+        )
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_post_page_queries_do_not_depend_on_comment_count(self) -> None:
+        # The first request also caches the session user.
+        self.reader_client.get(self.detail_url)
+        with CaptureQueriesContext(connection) as many:
+            self.reader_client.get(self.detail_url)
+        Comment.objects.filter(post=self.post).delete()
+        with CaptureQueriesContext(connection) as none:
+            self.reader_client.get(self.detail_url)
+
+        self.assertEqual(len(many), len(none))
+
+    def test_only_author_deletes_comment(self) -> None:
+        own = Comment.objects.filter(author=self.reader).first()
+        other = Comment.objects.filter(author=self.author).first()
+        kwargs = {'post_id': self.post.pk}
+
+        self.reader_client.post(reverse('posts:delete_comment', kwargs={
+            **kwargs, 'comment_id': other.pk
+        }))
+        response = self.reader_client.get(reverse(
+            'posts:delete_comment', kwargs={**kwargs, 'comment_id': own.pk}
+        ))
+        self.assertEqual(response.status_code, 405)
+        response = self.reader_client.post(reverse(
+            'posts:delete_comment', kwargs={**kwargs, 'comment_id': own.pk}
+        ))
+
+        self.assertRedirects(response, self.detail_url)
+        self.assertTrue(Comment.objects.filter(pk=other.pk).exists())
+        self.assertFalse(Comment.objects.filter(pk=own.pk).exists())
+
+
+@override_settings(CACHE_SHARED=True)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Test group', slug='test-slug', description='Description'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Test post'
+        )
+
+    def setUp(self) -> None:
+        cache.clear()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'group': reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ),
+            'profile': reverse(
+                'posts:profile', kwargs={'username': self.author.username}
+            ),
+            'post': reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ),
+        }
+
+    def assertRevalidates(self, url: str, change) -> None:
+        etag = self.reader_client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            not_modified = self.reader_client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            )
+        change()
+        modified = self.reader_client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertTemplateNotUsed(not_modified, 'base.html')
+        # The session, the user and the primary key of the page object.
+        self.assertLessEqual(len(queries), 3)
+        self.assertEqual(modified.status_code, 200)
+        self.assertNotEqual(modified['ETag'], etag)
+
+    def test_group_page_revalidates_until_new_post(self) -> None:
+        self.assertRevalidates(
+            self.urls['group'],
+            lambda: Post.objects.create(
+                author=self.reader, group=self.group, text='New post'
+            ),
+        )
+
+    def test_profile_page_revalidates_until_follow(self) -> None:
+        self.assertRevalidates(
+            self.urls['profile'],
+            lambda: Follow.objects.create(
+                user=self.reader, author=self.author
+            ),
+        )
+
+    def test_post_page_revalidates_until_new_comment(self) -> None:
+        self.assertRevalidates(
+            self.urls['post'],
+            lambda: Comment.objects.create(
+                post=self.post, author=self.reader, text='New comment'
+            ),
+        )
+
+    def test_post_page_revalidates_until_group_renamed(self) -> None:
+        def rename() -> None:
+            self.group.title = 'Renamed group'
+            self.group.save()
+
+        self.assertRevalidates(self.urls['post'], rename)
+
+    def test_etag_depends_on_user(self) -> None:
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.assertNotEqual(
+                    self.client.get(url)['ETag'],
+                    self.reader_client.get(url)['ETag'],
+                )
+
+    @override_settings(CACHE_SHARED=False)
+    def test_no_etag_without_shared_cache(self) -> None:
+        for url in self.urls.values():
+            with self.subTest(url=url):
+                self.assertNotIn('ETag', self.reader_client.get(url))
+
+    def test_missing_objects_are_not_found(self) -> None:
+        for url in (
+            reverse('posts:group_list', kwargs={'slug': 'missing'}),
+            reverse('posts:profile', kwargs={'username': 'missing'}),
+            reverse('posts:post_detail', kwargs={'post_id': 0}),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostCreateFormTests(TestCase):
@@ -0,0 +1,172 @@
+"""Post image variants generated off the request path.
+
+Saving a post with a new image queues it on a local thread pool once the
+transaction commits. The worker crops the image to the card proportions
+and stores it in every width of ``WIDTHS``, as WebP (when Pillow supports
+it) and as a JPEG fallback, recording each file as an ``ImageVariant``.
+Templates build ``<picture>`` markup from those rows and show a
+placeholder until they exist, so a request never decodes or resizes an
+original image. When a post's variants are ready its cached feed
+fragments are invalidated. An image that can't be converted is recorded
+in the ``thumbnail_failures`` cache namespace, and pages stop queueing it
+for ``settings.THUMBNAIL_RETRY_AFTER`` seconds. ``pregenerate_thumbnails``
+fills in the variants of existing posts.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Optional
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps, features
+
+from core import cache
+
+from . import fragments
+from .models import ImageVariant, Post
+
+logger = logging.getLogger(__name__)
+
+# Card proportions and the widths served to ``srcset``.
+ASPECT_RATIO = (960, 339)
+WIDTHS = (320, 640, 960)
+QUALITY = {ImageVariant.WEBP: 80, ImageVariant.JPEG: 85}
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+_pending = set()
+
+failures = cache.Namespace('thumbnail_failures')
+
+
+def executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.THUMBNAIL_WORKERS,
+                thread_name_prefix='thumbnails',
+            )
+        return _executor
+
+
+def formats():
+    """Variant formats this Pillow build can write, preferred first."""
+    if features.check('webp'):
+        return (ImageVariant.WEBP, ImageVariant.JPEG)
+    return (ImageVariant.JPEG,)
+
+
+def current(post: Post, variants=None) -> List[ImageVariant]:
+    """Variants made from the present image of ``post``, narrowest first.
+
+    ``variants`` defaults to ``post.image_variants.all()``, which uses
+    the prefetched rows of a feed.
+    """
+    if variants is None:
+        variants = post.image_variants.all()
+    return sorted(
+        (
+            variant for variant in variants
+            if variant.source == post.image.name
+        ),
+        key=lambda variant: variant.width,
+    )
+
+
+def _encode(image: Image.Image, image_format: str) -> bytes:
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        image_format.upper(),
+        quality=QUALITY[image_format],
+        optimize=True,
+    )
+    return buffer.getvalue()
+
+
+def generate(post_id: int) -> bool:
+    """Create the image variants of a post, replacing outdated ones.
+
+    Returns whether anything was created; the post's feeds are then
+    invalidated so they stop showing the placeholder.
+    """
+    post = Post.objects.filter(pk=post_id).only(
+        'image', 'author_id', 'group_id'
+    ).first()
+    if post is None or not post.image:
+        return False
+    variants = post.image_variants.all()
+    if len(current(post, variants)) == len(WIDTHS) * len(formats()):
+        return False
+    for variant in variants:
+        variant.delete()
+
+    stem = os.path.splitext(os.path.basename(post.image.name))[0]
+    with post.image.open('rb') as file, Image.open(file) as original:
+        original = ImageOps.exif_transpose(original).convert('RGB')
+        for width in WIDTHS:
+            height = round(width * ASPECT_RATIO[1] / ASPECT_RATIO[0])
+            resized = ImageOps.fit(
+                original, (width, height), Image.LANCZOS
+            )
+            for image_format in formats():
+                variant = ImageVariant(
+                    post=post,
+                    source=post.image.name,
+                    width=width,
+                    height=height,
+                    format=image_format,
+                )
+                variant.file.save(
+                    f'{stem}-{width}.{image_format}',
+                    ContentFile(_encode(resized, image_format)),
+                    save=False,
+                )
+                variant.save()
+    fragments.invalidate_post(post.author_id, post.group_id)
+    return True
+
+
+def _run(post_id: int) -> None:
+    try:
+        generate(post_id)
+    except Exception:
+        logger.exception('Image variants of post %s failed', post_id)
+        failures.set(str(post_id), 1, settings.THUMBNAIL_RETRY_AFTER)
+    finally:
+        with _lock:
+            _pending.discard(post_id)
+        connections.close_all()
+
+
+def submit(post_id: int) -> None:
+    """Queue the variants of a post unless they are already queued."""
+    with _lock:
+        if post_id in _pending:
+            return
+        _pending.add(post_id)
+    executor().submit(_run, post_id)
+
+
+def schedule(post: Post) -> None:
+    """Queue the variants of ``post`` once the transaction commits.
+
+    A new image gets another chance even if the previous one failed.
+    """
+    failures.delete(str(post.pk))
+    _queue(post.pk)
+
+
+def retry(post: Post) -> None:
+    """Queue the missing variants of ``post`` unless they failed lately."""
+    if failures.get(str(post.pk)) is None:
+        _queue(post.pk)
+
+
+def _queue(post_id: int) -> None:
+    transaction.on_commit(lambda: submit(post_id))
@@ -0,0 +1,147 @@
+"""Materialized follow timelines.
+
+Posts are pushed into each follower's timeline when they are created
+(fan-out on write), so the follow feed is read from a single indexed
+table instead of joining ``Follow`` and ``Post``. Authors with more than
+``settings.TIMELINE_FANOUT_THRESHOLD`` followers are not fanned out;
+their posts are merged into the feed at read time (fan-out on read).
+When such an author drops back to the threshold, their followers'
+timelines are backfilled, since their posts were never pushed.
+"""
+from itertools import islice
+from typing import Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+
+from core.paginator import CursorPaginator
+
+from .models import Follow, Post, TimelineEntry, UserCounters
+
+BATCH_SIZE = 500
+
+
+def _bulk_insert(entries: Iterable[TimelineEntry]) -> None:
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def is_celebrity(author_id: int) -> bool:
+    """Whether posts of the author are merged at read time."""
+    return UserCounters.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_THRESHOLD,
+    ).exists()
+
+
+def followed_celebrities(user) -> List[int]:
+    """Ids of the authors followed by ``user`` that are not fanned out."""
+    return list(UserCounters.objects.filter(
+        user__following__user=user,
+        followers_count__gt=settings.TIMELINE_FANOUT_THRESHOLD,
+    ).values_list('user_id', flat=True))
+
+
+def push(post: Post) -> None:
+    """Fan a new post out to the timelines of the author's followers."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in followers.iterator()
+    )
+
+
+def _copy_posts(follow: Follow) -> None:
+    posts = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-pk'
+    ).values_list('pk', 'pub_date')[:settings.TIMELINE_BACKFILL_LIMIT]
+    _bulk_insert(
+        TimelineEntry(
+            user_id=follow.user_id,
+            post_id=post_id,
+            author_id=follow.author_id,
+            pub_date=pub_date,
+        )
+        for post_id, pub_date in posts
+    )
+
+
+def backfill(follow: Follow) -> None:
+    """Copy the latest posts of a newly followed author."""
+    if not is_celebrity(follow.author_id):
+        _copy_posts(follow)
+
+
+def backfill_if_demoted(author_id: int) -> None:
+    """Backfill every follower once the author is fanned out again.
+
+    Called after an unfollow has been counted: an author left with exactly
+    ``settings.TIMELINE_FANOUT_THRESHOLD`` followers was merged at read
+    time until now, so their posts are missing from the timelines.
+    """
+    demoted = UserCounters.objects.filter(
+        user_id=author_id,
+        followers_count=settings.TIMELINE_FANOUT_THRESHOLD,
+    ).exists()
+    if demoted:
+        for follow in Follow.objects.filter(author_id=author_id).iterator():
+            _copy_posts(follow)
+
+
+def evict(follow: Follow) -> None:
+    """Drop the posts of an unfollowed author."""
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id,
+        author_id=follow.author_id,
+    ).delete()
+
+
+def rebuild(user) -> None:
+    """Recreate the timeline of ``user`` from the follow graph."""
+    TimelineEntry.objects.filter(user=user).delete()
+    for follow in Follow.objects.filter(user=user):
+        backfill(follow)
+
+
+class TimelinePaginator(CursorPaginator):
+    """Cursor paginator over the materialized timeline of ``user``.
+
+    ``object_list`` is only used to load the posts of the page, so every
+    page costs two index range scans plus one ``IN`` lookup.
+    """
+
+    def __init__(self, object_list, per_page, user) -> None:
+        super().__init__(object_list, per_page)
+        self.user = user
+
+    def fetch(self, position: Optional[Tuple[Any, int]],
+              reverse: bool = False) -> List[Post]:
+        limit = self.per_page + 1
+        keys = list(self.keyset(
+            TimelineEntry.objects.filter(user=self.user),
+            position,
+            reverse,
+            tiebreak='post_id',
+        ).values_list('pub_date', 'post_id')[:limit])
+        celebrities = followed_celebrities(self.user)
+        if celebrities:
+            keys += self.keyset(
+                Post.objects.filter(author_id__in=celebrities),
+                position,
+                reverse,
+            ).values_list('pub_date', 'pk')[:limit]
+        keys = sorted(set(keys), reverse=not reverse)[:limit]
+        posts = self.object_list.in_bulk([pk for _, pk in keys])
+        return [posts[pk] for _, pk in keys if pk in posts]
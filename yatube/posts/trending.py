@@ -0,0 +1,121 @@
+"""Trending feeds ranked by time-decayed comment velocity.
+
+A comment made at time ``t`` adds ``exp(λt)`` to the score of its post,
+with ``λ = ln 2 / settings.TRENDING_HALF_LIFE``: a comment counts half as
+much as one made a half-life later. Decaying every score to the present
+would multiply them all by the same factor, so the order never changes
+between comments and scores are only updated on comment insert. They are
+stored as logarithms to stay within floating point range. Deleted
+comments keep counting.
+
+The ``settings.TRENDING_SIZE`` best posts overall and in each group are
+copied to ``TrendingEntry``, which the feeds page through with a keyset on
+(score, post id). ``rebuild`` recomputes everything from the comments
+with ``posts.scoring``, which the migrations use as well.
+"""
+from typing import Any, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+
+from core.paginator import CursorPaginator
+
+from . import scoring
+from .models import Comment, Group, Post, TrendingEntry
+
+
+@transaction.atomic
+def record(comment: Comment) -> None:
+    """Add a new comment to the score of its post and to the top lists.
+
+    The score is read and written in one transaction, so comments posted
+    at the same time both count.
+    """
+    post = Post.objects.select_for_update().filter(
+        pk=comment.post_id
+    ).values_list('trending_score', 'group_id').first()
+    if post is None:
+        return
+    score, group_id = post
+    score = scoring.log_add(score, scoring.weight(comment.created))
+    Post.objects.filter(pk=comment.post_id).update(trending_score=score)
+    for scope in {None, group_id}:
+        _offer(scope, comment.post_id, score)
+
+
+def move(post: Post, old_group_id: Optional[int]) -> None:
+    """Follow a post to its new group."""
+    TrendingEntry.objects.filter(
+        group_id=old_group_id, post_id=post.pk
+    ).exclude(group=None).delete()
+    score = Post.objects.filter(pk=post.pk).values_list(
+        'trending_score', flat=True
+    ).first()
+    if score is not None and post.group_id is not None:
+        _offer(post.group_id, post.pk, score)
+
+
+def move_many(post_ids: List[int], group_id: Optional[int]) -> None:
+    """Move posts that all went to ``group_id`` to its top list."""
+    TrendingEntry.objects.filter(post_id__in=post_ids).exclude(
+        group=None
+    ).delete()
+    if group_id is None:
+        return
+    scores = Post.objects.filter(
+        pk__in=post_ids, trending_score__isnull=False
+    ).values_list('pk', 'trending_score')
+    for post_id, score in scores:
+        _offer(group_id, post_id, score)
+
+
+def _offer(group_id: Optional[int], post_id: int, score: float) -> None:
+    """Put the post into the top list if it scores high enough."""
+    entries = TrendingEntry.objects.filter(group_id=group_id)
+    if entries.filter(post_id=post_id).update(score=score):
+        return
+    if entries.count() >= settings.TRENDING_SIZE:
+        lowest = entries.order_by('score', 'post_id').first()
+        if lowest.score >= score:
+            return
+        lowest.delete()
+    TrendingEntry.objects.create(
+        group_id=group_id, post_id=post_id, score=score
+    )
+
+
+def rebuild() -> int:
+    """Recompute every score and top list; return the scored posts."""
+    return scoring.rebuild(Comment, Group, Post, TrendingEntry)
+
+
+class TrendingPaginator(CursorPaginator):
+    """Cursor paginator over a trending top list, best first.
+
+    ``object_list`` is only used to load the posts of the page; each post
+    gets its score as ``score``.
+    """
+
+    def __init__(self, object_list, per_page,
+                 group_id: Optional[int] = None) -> None:
+        super().__init__(object_list, per_page, key='score')
+        self.group_id = group_id
+
+    def to_python(self, value: Any) -> float:
+        return float(value)
+
+    def fetch(self, position: Optional[Tuple[Any, int]],
+              reverse: bool = False) -> List[Post]:
+        keys = list(self.keyset(
+            TrendingEntry.objects.filter(group_id=self.group_id),
+            position,
+            reverse,
+            tiebreak='post_id',
+        ).values_list('post_id', 'score')[:self.per_page + 1])
+        posts = self.object_list.in_bulk([pk for pk, _ in keys])
+        found = []
+        for pk, score in keys:
+            if pk in posts:
+                posts[pk].score = score
+                found.append(posts[pk])
+        return found
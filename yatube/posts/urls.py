@@ -18,7 +18,24 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.comments,
+        name='comments'
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/delete/',
+        views.delete_comment,
+        name='delete_comment'
+    ),
+    path('trending/', views.trending, name='trending'),
+    path(
+        'group/<slug:slug>/trending/',
+        views.trending,
+        name='group_trending'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,22 +1,52 @@
-from django.http import HttpResponse, HttpRequest
+from urllib.parse import urlencode
+
+from django.http import Http404, HttpResponse, HttpRequest
 from django.shortcuts import get_object_or_404, redirect, render
-from django.core.paginator import Paginator
+from django.core.paginator import Page
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
+from django.views.decorators.http import condition, require_POST
+
+from core import cache
+from core.paginator import CursorPaginator
 
 from .models import Comment, Follow, Post, Group, User
+from . import counters, fragments
 from .forms import CommentForm, PostForm
+from .search import SearchPaginator
+from .timeline import TimelinePaginator
+from .trending import TrendingPaginator
 
 POSTS_PER_PAGE = 10
+COMMENTS_PER_PAGE = 20
+
 
+def paginate(request: HttpRequest, posts) -> Page:
+    """Page of a post feed addressed by the ``cursor`` query parameter."""
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE)
 
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+def paginate_comments(request: HttpRequest, post_id: int) -> Page:
+    """Page of the comments of a post, newest first."""
+    paginator = CursorPaginator(
+        Comment.objects.filter(post_id=post_id).select_related('author'),
+        COMMENTS_PER_PAGE,
+        key='created',
+    )
+
+    return paginator.get_page(request.GET.get('cursor'))
+
+
+@cache.anonymous_page(fragments.index_etag)
+@condition(etag_func=fragments.index_etag)
 def index(request: HttpRequest) -> HttpResponse:
     """Index page."""
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, Post.objects.for_feed())
     context = {
         'page_obj': page_obj,
+        'cache_version': cache.versions(fragments.POSTS),
         'list_add': True,
         'group_add': True,
     }
@@ -24,30 +54,31 @@ def index(request: HttpRequest) -> HttpResponse:
     return render(request, 'posts/index.html', context)
 
 
+@cache.anonymous_page(fragments.group_etag)
+@condition(etag_func=fragments.group_etag)
 def group_posts(request: HttpRequest, slug: str) -> HttpResponse:
     """Group page."""
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate(request, group.posts.for_feed())
     context = {
         'group': group,
         'page_obj': page_obj,
+        'cache_version': cache.versions(fragments.group(group.pk)),
         'group_add': False,
     }
 
     return render(request, 'posts/group_list.html', context)
 
 
+@cache.anonymous_page(fragments.profile_etag)
+@condition(etag_func=fragments.profile_etag)
 def profile(request: HttpRequest, username: str) -> HttpResponse:
     """Profile page."""
-    user = get_object_or_404(User, username=username)
-    posts = Post.objects.select_related('author').filter(author=user).all()
-    count = posts.count()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    user = get_object_or_404(
+        User.objects.select_related('counters'), username=username
+    )
+    count = counters.for_user(user).posts_count
+    page_obj = paginate(request, user.posts.for_feed())
     following = None
     if request.user.is_authenticated:
         following = Follow.objects.filter(
@@ -57,6 +88,9 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
     context = {
         'author': user,
         'page_obj': page_obj,
+        'cache_version': cache.versions(
+            fragments.profile(user.pk), fragments.GROUPS
+        ),
         'count': count,
         'list_add': False,
         'group_add': True,
@@ -66,12 +100,15 @@ def profile(request: HttpRequest, username: str) -> HttpResponse:
     return render(request, 'posts/profile.html', context)
 
 
+@cache.anonymous_page(fragments.post_etag)
+@condition(etag_func=fragments.post_etag)
 def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
     """Post page."""
-    post = get_object_or_404(Post, id=post_id)
-    user = post.author_id
-    count = Post.objects.filter(author=user).count()
-    comments = Comment.objects.filter(post_id=post.id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'), id=post_id
+    )
+    count = counters.for_user(post.author).posts_count
+    comments = paginate_comments(request, post.id)
     form = CommentForm()
     context = {
         'post': post,
@@ -84,6 +121,7 @@ def post_detail(request: HttpRequest, post_id: int) -> HttpResponse:
 
 
 @login_required
+@transaction.atomic
 def post_create(request: HttpRequest) -> HttpResponse:
     """Create post."""
     form = PostForm(request.POST or None, files=request.FILES or None)
@@ -103,6 +141,7 @@ def post_create(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
+@transaction.atomic
 def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
     """Edit post."""
     post = get_object_or_404(Post, id=post_id)
@@ -131,6 +170,7 @@ def post_edit(request: HttpRequest, post_id: int) -> HttpResponse:
 
 
 @login_required
+@transaction.atomic
 def add_comment(request: HttpRequest, post_id: int) -> HttpResponse:
     """Comment."""
     post = get_object_or_404(Post, id=post_id)
@@ -144,19 +184,70 @@ def add_comment(request: HttpRequest, post_id: int) -> HttpResponse:
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@condition(etag_func=fragments.post_etag)
+def comments(request: HttpRequest, post_id: int) -> HttpResponse:
+    """Further pages of comments, as a fragment of the post page."""
+    comments = paginate_comments(request, post_id)
+    # A page with comments already shows that the post exists.
+    if not comments and not Post.objects.filter(pk=post_id).exists():
+        raise Http404
+    context = {
+        'post_id': post_id,
+        'comments': comments,
+    }
+
+    return render(request, 'includes/comment_list.html', context)
+
+
+@login_required
+@require_POST
+@transaction.atomic
+def delete_comment(request: HttpRequest, post_id: int,
+                   comment_id: int) -> HttpResponse:
+    """Delete a comment of the user."""
+    comment = get_object_or_404(
+        Comment, id=comment_id, post_id=post_id, author=request.user
+    )
+    comment.delete()
+
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+@cache.anonymous_page(fragments.trending_etag)
+@condition(etag_func=fragments.trending_etag)
+def trending(request: HttpRequest, slug: str = None) -> HttpResponse:
+    """Posts with the most recent comments, overall or in a group."""
+    group = slug and get_object_or_404(Group, slug=slug)
+    paginator = TrendingPaginator(
+        Post.objects.for_feed(), POSTS_PER_PAGE,
+        group_id=group.pk if group else None,
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+        'cache_version': cache.versions(
+            fragments.group(group.pk) if group else fragments.POSTS
+        ),
+        'list_add': True,
+        'group_add': not group,
+    }
+
+    return render(request, 'posts/trending.html', context)
+
+
 @login_required
 def follow_index(request: HttpRequest) -> HttpResponse:
     """Posts of people the user follows."""
-    posts = Post.objects.filter(
-        author__following__user=request.user
+    paginator = TimelinePaginator(
+        Post.objects.for_feed(), POSTS_PER_PAGE, user=request.user
     )
-    count = posts.count()
-    paginator = Paginator(posts, POSTS_PER_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     context = {
         'page_obj': page_obj,
-        'count': count,
+        'cache_version': cache.versions(
+            fragments.POSTS, fragments.follow(request.user.pk)
+        ),
         'list_add': True,
         'group_add': True,
     }
@@ -164,7 +255,26 @@ def follow_index(request: HttpRequest) -> HttpResponse:
     return render(request, 'posts/follow.html', context)
 
 
+def search(request: HttpRequest) -> HttpResponse:
+    """Posts matching the ``q`` query parameter, best matches first."""
+    query = request.GET.get('q', '').strip()
+    paginator = SearchPaginator(
+        Post.objects.for_feed(), POSTS_PER_PAGE, query=query
+    )
+    page_obj = paginator.get_page(request.GET.get('cursor'))
+    context = {
+        'query': query,
+        'query_string': urlencode({'q': query}),
+        'page_obj': page_obj,
+        'list_add': True,
+        'group_add': True,
+    }
+
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@transaction.atomic
 def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
     """Follow the author."""
     author = get_object_or_404(User, username=username)
@@ -178,6 +288,7 @@ def profile_follow(request: HttpRequest, username: str) -> HttpResponse:
 
 
 @login_required
+@transaction.atomic
 def profile_unfollow(request: HttpRequest, username: str) -> HttpResponse:
     """Unfollow the author"""
     author = get_object_or_404(User, username=username)
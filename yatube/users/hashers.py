@@ -0,0 +1,115 @@
+"""Password hashers running on a bounded thread pool.
+
+Hashing is CPU-bound and hashlib releases the GIL while it works. A pool
+of ``settings.PASSWORD_HASHING_WORKERS`` threads lets a login burst use
+every core but never computes more hashes at once; further logins wait
+in the pool's queue while the request threads keep serving other pages.
+
+``ScryptPasswordHasher`` is the preferred hasher. It is memory-hard, which
+makes guessing on GPUs expensive, at about the CPU cost per login of
+Django's PBKDF2 with the default parameters. Django rehashes a
+password with the first entry of ``PASSWORD_HASHERS`` on the next
+successful login, so existing PBKDF2 hashes, and scrypt hashes made with
+older ``PASSWORD_SCRYPT_*`` settings, are upgraded transparently.
+"""
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Optional
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.utils.crypto import constant_time_compare
+from django.utils.translation import gettext_noop as _
+
+_executor: Optional[Executor] = None
+_lock = threading.Lock()
+
+
+def executor() -> Executor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.PASSWORD_HASHING_WORKERS,
+                thread_name_prefix='hashing',
+            )
+        return _executor
+
+
+def run(function, *args, **kwargs):
+    """Call ``function`` on the hashing pool and wait for its result."""
+    return executor().submit(function, *args, **kwargs).result()
+
+
+class ScryptPasswordHasher(hashers.BasePasswordHasher):
+    """scrypt with the cost from ``settings.PASSWORD_SCRYPT_*``."""
+
+    algorithm = 'scrypt'
+    dklen = 64
+
+    @staticmethod
+    def parameters():
+        return (
+            settings.PASSWORD_SCRYPT_N,
+            settings.PASSWORD_SCRYPT_R,
+            settings.PASSWORD_SCRYPT_P,
+        )
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        assert password is not None
+        assert salt and '$' not in salt
+        if n is None:
+            n, r, p = self.parameters()
+        hash = run(
+            hashlib.scrypt,
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            # scrypt needs 128 * n * r * p bytes; leave room for the rest.
+            maxmem=256 * n * r * p,
+            dklen=self.dklen,
+        )
+        hash = base64.b64encode(hash).decode('ascii').strip()
+        return f'{self.algorithm}${n}${r}${p}${salt}${hash}'
+
+    @staticmethod
+    def decode(encoded):
+        algorithm, n, r, p, salt, hash = encoded.split('$', 5)
+        return algorithm, int(n), int(r), int(p), salt, hash
+
+    def verify(self, password, encoded) -> bool:
+        algorithm, n, r, p, salt, _ = self.decode(encoded)
+        assert algorithm == self.algorithm
+        return constant_time_compare(
+            encoded, self.encode(password, salt, n, r, p)
+        )
+
+    def safe_summary(self, encoded):
+        algorithm, n, r, p, salt, hash = self.decode(encoded)
+        return OrderedDict([
+            (_('algorithm'), algorithm),
+            (_('work factor'), n),
+            (_('block size'), r),
+            (_('parallelism'), p),
+            (_('salt'), hashers.mask_hash(salt)),
+            (_('hash'), hashers.mask_hash(hash)),
+        ])
+
+    def must_update(self, encoded) -> bool:
+        return self.decode(encoded)[1:4] != self.parameters()
+
+    def harden_runtime(self, password, encoded) -> None:
+        # Cheaper hashes are upgraded on login instead.
+        pass
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """Django's PBKDF2 hasher on the pool, for hashes made before scrypt."""
+
+    def encode(self, password, salt, iterations=None):
+        return run(super().encode, password, salt, iterations)
@@ -0,0 +1,102 @@
+import os
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure logins per second, and per hashing core, through the '
+        'login page.'
+    )
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--logins', type=int, default=200,
+            help='Logins sent through the login page.',
+        )
+        parser.add_argument(
+            '--concurrency', type=int,
+            default=2 * settings.PASSWORD_HASHING_WORKERS,
+            help='Logins in flight at once.',
+        )
+        parser.add_argument(
+            '--hasher', default=get_hasher().algorithm,
+            help='Algorithm of the password hash, e.g. pbkdf2_sha256.',
+        )
+
+    def handle(self, *args, **options) -> None:
+        algorithm = options['hasher']
+        hashers = [
+            path for path in settings.PASSWORD_HASHERS
+            if import_string(path).algorithm == algorithm
+        ]
+        if not hashers:
+            raise CommandError(f'Unknown hasher {algorithm}.')
+        password = uuid.uuid4().hex
+        # The chosen hasher goes first so logins don't upgrade the hash, and
+        # throttling is off so every login reaches the hasher.
+        with override_settings(
+            PASSWORD_HASHERS=hashers + settings.PASSWORD_HASHERS,
+            THROTTLES={'ip': (10 ** 9, 1), 'account': (10 ** 9, 1)},
+        ):
+            user = User.objects.create(
+                username=f'benchmark-{password[:8]}',
+                password=make_password(password, hasher=algorithm),
+            )
+            try:
+                elapsed, timings = self.run_logins(
+                    user.username,
+                    password,
+                    options['logins'],
+                    options['concurrency'],
+                )
+            finally:
+                user.delete()
+        self.report(algorithm, elapsed, timings)
+
+    @staticmethod
+    def run_logins(username: str, password: str, logins: int,
+                   concurrency: int):
+        url = reverse('users:login')
+
+        def login(_) -> float:
+            client = Client()
+            start = time.perf_counter()
+            response = client.post(
+                url, {'username': username, 'password': password}
+            )
+            timing = time.perf_counter() - start
+            if response.status_code != 302:
+                raise CommandError(f'Login failed: {response.status_code}.')
+            client.logout()
+            return timing
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            timings = list(pool.map(login, range(logins)))
+        return time.perf_counter() - start, timings
+
+    def report(self, algorithm: str, elapsed: float,
+               timings: List[float]) -> None:
+        cores = min(settings.PASSWORD_HASHING_WORKERS, os.cpu_count() or 1)
+        rate = len(timings) / elapsed
+        percentiles = statistics.quantiles(timings, n=20)
+        self.stdout.write(
+            f'{algorithm}: {rate:.1f} logins/s, '
+            f'{rate / cores:.1f} per core ({cores} cores), '
+            f'p50 {percentiles[9] * 1000:.1f} ms, '
+            f'p95 {percentiles[18] * 1000:.1f} ms'
+        )
@@ -0,0 +1,89 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+User = get_user_model()
+
+
+class PasswordHashingTests(TestCase):
+    def test_scrypt_hashes_verify(self) -> None:
+        encoded = make_password('secret')
+
+        self.assertTrue(encoded.startswith('scrypt$'))
+        self.assertTrue(get_hasher().verify('secret', encoded))
+        self.assertFalse(get_hasher().verify('wrong', encoded))
+
+    def test_tuned_parameters_need_a_rehash(self) -> None:
+        encoded = make_password('secret')
+
+        self.assertFalse(get_hasher().must_update(encoded))
+        with override_settings(PASSWORD_SCRYPT_N=2 ** 15):
+            self.assertTrue(get_hasher().must_update(encoded))
+
+    def test_login_upgrades_pbkdf2_hashes(self) -> None:
+        user = User.objects.create(
+            username='user',
+            password=make_password('secret', hasher='pbkdf2_sha256'),
+        )
+
+        self.assertTrue(
+            self.client.login(username='user', password='secret')
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$'))
+
+
+class ThrottlingTests(TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        User.objects.create_user(username='user', password='secret')
+        self.url = reverse('users:login')
+
+    @override_settings(THROTTLES={'ip': (100, 60), 'account': (2, 60)})
+    def test_failed_logins_lock_the_account(self) -> None:
+        for _ in range(2):
+            self.client.post(
+                self.url, {'username': 'user', 'password': 'wrong'}
+            )
+
+        response = self.client.post(
+            self.url, {'username': 'user', 'password': 'secret'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertTrue(response.context['form'].non_field_errors())
+        response = self.client.post(
+            self.url, {'username': 'other', 'password': 'wrong'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(THROTTLES={'ip': (1, 60), 'account': (100, 60)})
+    def test_client_ip_is_throttled(self) -> None:
+        response = self.client.post(
+            self.url, {'username': 'user', 'password': 'secret'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+        response = self.client.post(reverse('users:signup'), {
+            'username': 'new', 'password1': 'pass', 'password2': 'pass'
+        })
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertFalse(User.objects.filter(username='new').exists())
+
+
+class LoginBenchmarkTests(TransactionTestCase):
+    def test_benchmark_reports_logins_per_core(self) -> None:
+        out = StringIO()
+
+        call_command(
+            'benchmark_logins', logins=2, concurrency=1, stdout=out
+        )
+
+        self.assertIn('logins/s', out.getvalue())
+        self.assertFalse(User.objects.exists())
@@ -0,0 +1,45 @@
+"""Login and signup throttling.
+
+Attempts are counted in fixed windows in the ``throttles`` namespace of
+``core.cache``. ``settings.THROTTLES`` maps each scope to the attempts
+allowed per window and the window length in seconds. The views count
+every login and signup per client IP (``ip``) and failed logins per
+username (``account``), and refuse a throttled request before its
+password is hashed.
+"""
+import time
+from typing import Optional
+
+from django.conf import settings
+
+from core import cache
+
+throttles = cache.Namespace('throttles')
+
+
+def _key(scope: str, ident: str) -> str:
+    period = settings.THROTTLES[scope][1]
+    return f'{scope}:{ident}:{int(time.time() // period)}'
+
+
+def hit(scope: str, ident: str) -> None:
+    """Count an attempt."""
+    key = _key(scope, ident)
+    if throttles.add(key, 1, settings.THROTTLES[scope][1]):
+        return
+    try:
+        throttles.incr(key)
+    except ValueError:
+        throttles.add(key, 1, settings.THROTTLES[scope][1])
+
+
+def retry_after(scope: str, ident: str) -> Optional[int]:
+    """Seconds until ``ident`` may try again, or None if it may now."""
+    limit, period = settings.THROTTLES[scope]
+    if throttles.get(_key(scope, ident), 0) < limit:
+        return None
+    return int(period - time.time() % period) + 1
+
+
+def reset(scope: str, ident: str) -> None:
+    throttles.delete(_key(scope, ident))
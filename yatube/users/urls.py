@@ -1,5 +1,5 @@
 from django.contrib.auth import views
-from django.contrib.auth.views import LoginView, LogoutView
+from django.contrib.auth.views import LogoutView
 from django.contrib.auth.views import PasswordResetCompleteView
 from django.contrib.auth.views import PasswordResetView
 from django.contrib.auth.views import PasswordChangeDoneView
@@ -24,7 +24,7 @@ urlpatterns = [
     ),
     path(
         "login/",
-        LoginView.as_view(template_name="users/login.html"),
+        views.Login.as_view(template_name="users/login.html"),
         name="login"
     ),
     path(
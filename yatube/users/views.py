@@ -1,9 +1,62 @@
+from django.contrib.auth.views import LoginView
+from django.core.exceptions import NON_FIELD_ERRORS
 from django.views.generic import CreateView
 from django.urls import reverse_lazy
+
+from . import throttling
 from .forms import CreationForm
 
 
-class SignUp(CreateView):
+class ThrottledFormMixin:
+    """Refuse form posts over the throttles before any password is hashed.
+
+    Every post counts against the client IP; ``account_throttled`` views
+    also refuse usernames with too many failed attempts.
+    """
+    account_throttled = False
+
+    def post(self, request, *args, **kwargs):
+        ip = request.META.get('REMOTE_ADDR', '')
+        username = request.POST.get('username', '')
+        wait = throttling.retry_after('ip', ip)
+        if wait is None and self.account_throttled:
+            wait = throttling.retry_after('account', username)
+        throttling.hit('ip', ip)
+        if wait is not None:
+            return self.throttled(wait, username)
+        return super().post(request, *args, **kwargs)
+
+    def throttled(self, wait: int, username: str):
+        kwargs = self.get_form_kwargs()
+        kwargs.pop('data', None)
+        kwargs.pop('files', None)
+        kwargs['initial'] = {**kwargs.get('initial', {}), 'username': username}
+        form = self.get_form_class()(**kwargs)
+        # An unbound form, so the password is never checked.
+        form.errors[NON_FIELD_ERRORS] = form.error_class(
+            [f'Слишком много попыток. Повторите через {wait} с.']
+        )
+        response = self.render_to_response(
+            self.get_context_data(form=form), status=429
+        )
+        response['Retry-After'] = str(wait)
+        return response
+
+
+class Login(ThrottledFormMixin, LoginView):
+    account_throttled = True
+
+    def form_valid(self, form):
+        throttling.reset('account', form.get_user().get_username())
+        return super().form_valid(form)
+
+    def form_invalid(self, form):
+        throttling.hit('account', self.request.POST.get('username', ''))
+        return super().form_invalid(form)
+
+
+class SignUp(ThrottledFormMixin, CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+    object = None
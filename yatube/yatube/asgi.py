@@ -0,0 +1,23 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named
+``application``, for servers such as uvicorn or daphne. Django 2.2 has no
+ASGI handler, so requests run on the WSGI application in a pool of
+``settings.ASGI_THREADS`` threads (see core.asgi).
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core import template_loaders
+from core.asgi import WsgiToAsgi
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(get_wsgi_application(), settings.ASGI_THREADS)
+
+# Parse every template before the first request (precompiled mode only).
+template_loaders.warm()
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'core.apps.CoreConfig',
     'about.apps.AboutConfig',
+    'api.apps.ApiConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
@@ -45,7 +46,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,12 +61,34 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# YATUBE_TEMPLATES=precompiled, the default without DEBUG, keeps parsed
+# templates in memory, inlines the includes in TEMPLATE_INLINED_INCLUDES
+# and parses every template when a worker starts (core.template_loaders).
+# YATUBE_TEMPLATES=reload reads templates again on every render.
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATE_MODE = os.environ.get(
+    'YATUBE_TEMPLATES', 'reload' if DEBUG else 'precompiled'
+)
+if TEMPLATE_MODE == 'precompiled':
+    TEMPLATE_LOADERS = [('core.template_loaders.Loader', TEMPLATE_LOADERS)]
+TEMPLATE_INLINED_INCLUDES = [
+    'includes/post_feed_card.html',
+    'includes/paginator.html',
+    'includes/comment.html',
+    'includes/comment_list.html',
+    'includes/switcher.html',
+    'includes/header.html',
+    'includes/footer.html',
+]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backends.InstrumentedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -80,11 +106,73 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# SQLite in WAL mode: readers never wait for the writer, and writers queue
+# for up to busy_timeout ms (core.db_backends.sqlite3). Connections are
+# kept for CONN_MAX_AGE seconds so the pragmas run once per worker thread.
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db_backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'busy_timeout': 20000,
+                'cache_size': -64000,
+                'mmap_size': 256 * 1024 * 1024,
+                'temp_store': 'MEMORY',
+            },
+        },
+    }
+}
+
+# Read replicas: YATUBE_REPLICAS lists SQLite files, separated by
+# os.pathsep, that serve the reads of GET requests (core.routers). Locally
+# the sync_replicas command copies the primary into them in place of real
+# replication. A client that wrote reads from the primary for
+# REPLICA_STICKINESS seconds.
+DATABASE_REPLICAS = []
+for number, path in enumerate(filter(
+    None, os.environ.get('YATUBE_REPLICAS', '').split(os.pathsep)
+), 1):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': path,
+        'OPTIONS': {'pragmas': {
+            **DATABASES['default']['OPTIONS']['pragmas'], 'query_only': 'ON'
+        }},
+        'TEST': {'MIRROR': 'default'},
     }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+REPLICA_STICKINESS = 5
+
+# Sessions live in the cache and reach the database in the background
+# (core.session_backends); session users are cached too
+# (core.auth_backends).
+SESSION_ENGINE = 'core.session_backends'
+
+AUTHENTICATION_BACKENDS = ['core.auth_backends.CachedModelBackend']
+
+# Passwords are hashed with scrypt on a pool of PASSWORD_HASHING_WORKERS
+# threads (users.hashers); older hashes are upgraded on login.
+PASSWORD_HASHERS = [
+    'users.hashers.ScryptPasswordHasher',
+    'users.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+PASSWORD_SCRYPT_N = 2 ** 14
+PASSWORD_SCRYPT_R = 8
+PASSWORD_SCRYPT_P = 1
+PASSWORD_HASHING_WORKERS = os.cpu_count() or 1
+
+# Attempts allowed per window of seconds (users.throttling): logins and
+# signups per client IP, failed logins per username.
+THROTTLES = {
+    'ip': (30, 60),
+    'account': (5, 5 * 60),
 }
 
 
@@ -131,6 +219,23 @@ STATIC_URL = '/static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Threads per process creating post image variants (posts.thumbnails).
+THUMBNAIL_WORKERS = 2
+# Seconds before pages queue the variants of an image that failed again.
+THUMBNAIL_RETRY_AFTER = 60 * 60
+
+# Rows a moderation job (posts.moderation) changes per transaction, and
+# seconds it waits between transactions so requests can write.
+MODERATION_BATCH_SIZE = 500
+MODERATION_PAUSE = 0.1
+# A running job whose row wasn't saved for this many seconds is considered
+# abandoned by its process and may be resumed by another one.
+MODERATION_STALE_AFTER = 5 * 60
+
+# Threads per process serving requests behind the ASGI entry point
+# (yatube.asgi).
+ASGI_THREADS = 8
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
@@ -141,8 +246,84 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
+# Every worker process has its own LocMemCache. Set YATUBE_CACHE=sqlite
+# to share one cache between the workers of a host (core.cache_backends),
+# or YATUBE_CACHE=memcached with YATUBE_CACHE_LOCATION for several hosts.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'sqlite': 'core.cache_backends.SQLiteCache',
+    'memcached': 'django.core.cache.backends.memcached.MemcachedCache',
+}
+CACHE_LOCATIONS = {
+    'locmem': '',
+    'sqlite': os.path.join(BASE_DIR, 'cache.sqlite3'),
+    'memcached': '127.0.0.1:11211',
+}
+# memcached evicts by itself and rejects MAX_ENTRIES.
+CACHE_OPTIONS = {
+    'locmem': {'MAX_ENTRIES': 10000},
+    'sqlite': {'MAX_ENTRIES': 10000},
+    'memcached': {},
+}
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'locmem')
+# Whether every worker sees the same cache. Version based ETags and the
+# anonymous page cache are only used with a shared cache: a worker with
+# its own cache never sees the other workers' invalidations.
+CACHE_SHARED = CACHE_BACKEND != 'locmem'
+
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_LOCATION', CACHE_LOCATIONS[CACHE_BACKEND]
+        ),
+        'OPTIONS': CACHE_OPTIONS[CACHE_BACKEND],
     }
 }
+
+# Default timeouts of the core.cache namespaces, in seconds; None keeps
+# the keys until they are overwritten or evicted. Version tokens of a
+# per-process cache expire quickly so that fragments cached by one worker
+# catch up with changes made through another.
+CACHE_NAMESPACE_TIMEOUTS = {
+    'fragments': 60 * 60,
+    'versions': None if CACHE_SHARED else 60,
+    'locks': 10,
+    'pages': 10 * 60,
+    'users': 5 * 60,
+}
+
+# Follow timelines: authors with more followers than the threshold are
+# merged into the feed at read time instead of being fanned out on write.
+TIMELINE_FANOUT_THRESHOLD = 1000
+TIMELINE_BACKFILL_LIMIT = 1000
+
+# Trending feeds (posts.trending): a comment counts half as much as one
+# made TRENDING_HALF_LIFE seconds later; each feed keeps the best
+# TRENDING_SIZE posts.
+TRENDING_HALF_LIFE = 6 * 60 * 60
+TRENDING_SIZE = 100
+
+# Maximum number of SQL queries per view, checked by
+# core.middleware.QueryMetricsMiddleware and by the test suite.
+QUERY_BUDGETS = {
+    'posts:index': 4,
+    'posts:group_list': 6,
+    'posts:profile': 7,
+    'posts:post_detail': 5,
+    'posts:comments': 4,
+    'posts:follow_index': 6,
+    'posts:search': 5,
+    'posts:trending': 4,
+    'posts:group_trending': 6,
+    'api:posts': 3,
+    'api:group_posts': 5,
+    'api:profile_posts': 5,
+    'api:follow': 5,
+}
+QUERY_BUDGETS_STRICT = False
+
+# Versioned template fragments (core.cache) are invalidated by model
+# signals and recomputed early by a single request at a time; a higher
+# beta recomputes earlier.
+FRAGMENT_CACHE_BETA = 1.0